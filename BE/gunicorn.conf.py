@@ -0,0 +1,20 @@
+import os
+import multiprocessing
+
+# Workers share caches, rate-limit buckets, chat sessions and metrics (services/shared_store.py)
+os.environ.setdefault('SHARED_STATE_ENABLED', 'true')
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'uvicorn.workers.UvicornWorker'
+# Import the app once in the master and fork workers from it
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    """Runs in the master once the app is loaded, before any worker is forked"""
+    import main
+    main.prefork_startup()
@@ -1,10 +1,19 @@
-from fastapi import FastAPI, HTTPException, Query
+import time
+import threading
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from routes import job_routes, admin_routes, chat_routes
 from services.data_import_service import DataImportService
 from services.llm_query_parser import LLMQueryParser
 from services.llm_result_analyzer import LLMResultAnalyzer
 from services.job_search_service import JobSearchService
+from services.fallback_search import get_fallback_search
+from services.cache_warmer import start_warmup
+from services.cache import cache_stats
+from services.metrics import collect_metrics, get_worker_metrics
+from services.shared_store import get_shared_store
+from services.suggest_service import get_suggest_service
+from services.market_aggregates import get_market_aggregate_service
 
 app = FastAPI(
     title="AI-Powered Job Search API",
@@ -21,6 +30,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+worker_metrics = get_worker_metrics()
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Count requests and latency per route template for /metrics"""
+    started = time.time()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        worker_metrics.observe(route.path if route else 'unmatched', status, (time.time() - started) * 1000)
+
 # Include routers
 app.include_router(job_routes.router)
 app.include_router(admin_routes.router)
@@ -33,12 +57,52 @@ data_import_service = DataImportService()
 llm_parser = LLMQueryParser()
 llm_analyzer = LLMResultAnalyzer()
 job_search = JobSearchService()
+fallback_search = get_fallback_search()
+
+# Set by prefork_startup() when gunicorn preloads the app (see gunicorn.conf.py)
+preforked = False
+
+def prefork_startup():
+    """
+    One-time setup in the gunicorn master, before workers are forked.
+
+    Only local work happens here: network connections must not be inherited
+    by the workers, so collection setup and cache warm-up run in the first
+    worker to start instead.
+    """
+    global preforked
+    print("🚀 Preparing AI-Powered Job Search API for worker processes...")
+    admin_routes.job_queue.recover()
+    # Build the in-memory indexes once so the forked workers share them
+    get_suggest_service().index()
+    get_market_aggregate_service().aggregates()
+    fallback_search.index()
+    store = get_shared_store()
+    if store is not None:
+        store.reset_metrics()
+        store.clear('startup')
+    preforked = True
+
+def setup_and_warm():
+    data_import_service.setup_jobs_collection()
+    start_warmup()
 
 @app.on_event("startup")
 async def startup_event():
     """Set up the application on startup"""
     print("🚀 Starting AI-Powered Job Search API with LLM...")
-    data_import_service.setup_jobs_collection()
+    worker_metrics.start_flusher()
+    if not preforked:
+        data_import_service.setup_jobs_collection()
+        admin_routes.job_queue.recover()
+        admin_routes.job_queue.start()
+        start_warmup()
+        return
+    admin_routes.job_queue.start()
+    store = get_shared_store()
+    if store is None or store.claim('startup', 'setup', ttl=365 * 24 * 3600):
+        # In the background so a long initial import does not trip the worker timeout
+        threading.Thread(target=setup_and_warm, name='startup-setup', daemon=True).start()
 
 @app.get('/')
 def read_root():
@@ -60,12 +124,14 @@ def health_check():
             'typesense_connection': 'ok',
             'collection': 'jobs',
             'total_documents': collection.get('num_documents', 0),
+            'search_mode': 'fallback' if fallback_search.degraded else 'typesense',
             'llm_available': True
         }
     except Exception as e:
         return {
-            'status': 'unhealthy',
+            'status': 'degraded' if fallback_search.index() is not None else 'unhealthy',
             'typesense_connection': 'error',
+            'search_mode': 'fallback',
             'error': str(e),
             'llm_available': True
         }
@@ -78,6 +144,16 @@ def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
+@app.get('/metrics')
+def get_metrics():
+    """Request metrics summed over all worker processes"""
+    return {
+        **collect_metrics(),
+        'caches': cache_stats(),
+        'chat_sessions': chat_routes.chat_sessions.stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
+    # Single process for development; production runs `gunicorn -c gunicorn.conf.py main:app`
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -14,4 +14,6 @@ class Job(BaseModel):
     experience_level: Optional[str] = "mid"
     remote_friendly: Optional[bool] = False
     posted_date: Optional[str] = None
-    skills: Optional[List[str]] = [] 
\ No newline at end of file
+    skills: Optional[List[str]] = []
+    duplicate_count: Optional[int] = 0
+    cluster_id: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,10 @@
+"""
+Replay captured queries against a local build for benchmarking.
+
+Usage:
+    python replay_queries.py --base-url http://localhost:8000 --speed 4
+"""
+from services.query_replay import main
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,107 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from services.data_import_service import DataImportService
+from services.job_queue import JobQueue
+from services.cache import get_cache
+from services.cache_warmer import warm_caches
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 data_import_service = DataImportService()
+job_queue = JobQueue()
+
+def _after_reindex(success):
+    """Drop stale search results and re-warm them from the query log"""
+    if success:
+        get_cache('search_results').clear()
+        warm_caches()
+    return success
+
+def run_import_data(progress):
+    """Background task: import job data into the existing collection"""
+    return _after_reindex(data_import_service.import_job_data(progress))
+
+def run_import_transformed(progress):
+    """Background task: stream pre-transformed NDJSON shards into the collection"""
+    return _after_reindex(data_import_service.import_transformed_data(progress))
+
+def run_reset_collection(progress):
+    """Background task: delete and recreate the collection with fresh data"""
+    try:
+        data_import_service.typesense_client.delete_collection()
+        print(f"🗑️ Deleted collection 'jobs'")
+    except Exception as e:
+        print(f"⚠️ Could not delete collection 'jobs': {e}")
+    return _after_reindex(data_import_service.setup_jobs_collection(progress))
+
+def run_warm_cache(progress):
+    """Background task: pre-execute the most frequent logged queries"""
+    return warm_caches()
+
+job_queue.register('import-data', run_import_data)
+job_queue.register('import-transformed', run_import_transformed)
+job_queue.register('reset-collection', run_reset_collection)
+job_queue.register('warm-cache', run_warm_cache)
+
+def _job_accepted(job):
+    return {
+        "message": f"Job '{job['kind']}' queued",
+        "job_id": job['id'],
+        "status": job['status'],
+        "status_url": f"/admin/jobs/{job['id']}"
+    }
 
 @router.get('/import-data')
 def import_data_endpoint():
-    """Manually trigger data import"""
+    """Queue a data import and return its job id immediately"""
     try:
-        success = data_import_service.import_job_data()
-        if success:
-            return {"message": "Data import completed successfully"}
-        else:
-            return {"message": "Data import failed"}
+        return _job_accepted(job_queue.submit('import-data'))
+    except Exception as e:
+        return {"error": str(e)}
+
+@router.get('/import-transformed')
+def import_transformed_endpoint():
+    """Queue an import of the NDJSON shards written by transform_job_data.py"""
+    try:
+        return _job_accepted(job_queue.submit('import-transformed'))
     except Exception as e:
         return {"error": str(e)}
 
 @router.get('/reset-collection')
 def reset_collection():
-    """Delete and recreate the collection with fresh data"""
+    """Queue a delete + recreate of the collection with fresh data"""
     try:
-        # Delete existing collection
-        data_import_service.typesense_client.delete_collection()
-        print(f"🗑️ Deleted collection 'jobs'")
-        
-        # Recreate and import
-        success = data_import_service.setup_jobs_collection()
-        if success:
-            return {"message": "Collection reset and data imported successfully"}
-        else:
-            return {"message": "Collection reset failed"}
+        return _job_accepted(job_queue.submit('reset-collection'))
+    except Exception as e:
+        return {"error": str(e)}
+
+@router.get('/warm-cache')
+def warm_cache_endpoint():
+    """Queue a cache warm-up from the top logged queries"""
+    try:
+        return _job_accepted(job_queue.submit('warm-cache'))
     except Exception as e:
         return {"error": str(e)}
 
+@router.get('/jobs')
+def list_jobs(limit: int = Query(20, ge=1, le=100)):
+    """List recent background jobs"""
+    return {"jobs": job_queue.list(limit)}
+
+@router.get('/jobs/{job_id}')
+def get_job_status(job_id: str):
+    """Get status and progress of a background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post('/jobs/{job_id}/cancel')
+def cancel_job(job_id: str):
+    """Cancel a queued or running background job"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 @router.get('/debug-collection')
 def debug_collection():
     """Debug collection information"""
@@ -1,13 +1,23 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from database.typesense_client import TypesenseClient
+from typing import Optional
+from services.job_search_service import JobSearchService
+from services.query_log import get_query_log
+from services.cache_warmer import register_warmer
+from services.chat_session import get_chat_session_store
+from services.rate_limit import RateLimited, acquire_llm_slot
 import openai
 import os
 
 router = APIRouter(prefix="/chat", tags=["chat"])
+job_search_service = JobSearchService()
+query_log = get_query_log()
+chat_sessions = get_chat_session_store()
 
 class ChatRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None
+    # Only needed without a session_id; sessions keep history and context server-side
     history: list = []
     context: dict = None
 
@@ -16,41 +26,30 @@ def should_use_typesense(message: str) -> bool:
     keywords = ["search", "find", "show me", "job", "jobs", "position", "opening"]
     return any(kw in message.lower() for kw in keywords)
 
+# Plain def: the rate-limit wait, session store and OpenAI call all block,
+# so FastAPI runs this in its threadpool instead of on the event loop
 @router.post("/")
-async def chat_with_ai(chat: ChatRequest):
-    context = ""
-    # 1. If the message is a search, use Typesense
+def chat_with_ai(chat: ChatRequest):
+    query_log.log('/chat/', {'message': chat.message}, method='POST')
+    session = chat_sessions.get_or_create(chat.session_id)
+    if chat.history and not session.history:
+        for h in chat.history:
+            session.add_message(h["role"], h["content"])
+    session.set_job_context(chat.context)
+    # 1. If the message is a search, reuse this session's earlier results or query Typesense
+    job_ids = None
     if should_use_typesense(chat.message):
-        typesense = TypesenseClient()
-        search_results = typesense.search_documents({
-            "q": chat.message,
-            "query_by": "title,company,description",
-            "per_page": 3
-        })
-        job_summaries = []
-        for hit in search_results.get("hits", []):
-            doc = hit["document"]
-            job_summaries.append(f"{doc['title']} at {doc['company']} in {doc['location']}: {doc['description'][:100]}...")
-        jobs_text = "\n".join(f"{i+1}. {s}" for i, s in enumerate(job_summaries))
-        context = f"Here are some job listings found for the user's query:\n{jobs_text}\n\n"
-    # 1b. If a job context is provided, prepend it to the user message
-    job_context_str = ""
-    if chat.context:
-        job_context_str = (
-            f"Job Context:\nTitle: {chat.context.get('title', '')}\n"
-            f"Company: {chat.context.get('company', '')}\n"
-            f"Location: {chat.context.get('location', '')}\n"
-            f"Salary: {chat.context.get('salary', 'N/A')}\n"
-            f"Description: {chat.context.get('description', '')}\n\n"
-        )
-    # 2. Build the prompt with chat history and (if present) job context
-    messages = [{"role": "system", "content": "You are a helpful assistant for job seekers."}]
-    for h in chat.history:
-        messages.append({"role": h["role"], "content": h["content"]})
-    # Add the context and the latest user message
-    user_content = (job_context_str if job_context_str else "") + (context if context else "") + chat.message
-    messages.append({"role": "user", "content": user_content})
+        job_ids = session.cached_retrieval(chat.message)
+        if job_ids is None:
+            search_results = job_search_service.chat_context_search(chat.message)
+            job_ids = session.add_retrieval(chat.message, [hit["document"] for hit in search_results.get("hits", [])])
+    # 2. Build the prompt from the bounded history window and the accumulated context
+    messages = session.build_messages(chat.message, job_ids)
     # 3. Call OpenAI
+    try:
+        acquire_llm_slot()
+    except RateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e))
     client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     response = client.chat.completions.create(
         model="gpt-3.5-turbo",
@@ -58,4 +57,20 @@ async def chat_with_ai(chat: ChatRequest):
         temperature=0.7
     )
     ai_reply = response.choices[0].message.content
-    return {"reply": ai_reply} 
\ No newline at end of file
+    session.add_message("user", chat.message)
+    session.add_message("assistant", ai_reply)
+    chat_sessions.save(session)
+    return {"reply": ai_reply, "session_id": session.session_id}
+
+@router.delete("/{session_id}")
+def end_chat_session(session_id: str):
+    if not chat_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return {"session_id": session_id, "deleted": True}
+
+def warm_chat_retrieval(params):
+    """Replay a logged chat message's retrieval step"""
+    if should_use_typesense(params['message']):
+        job_search_service.chat_context_search(params['message'])
+
+register_warmer('/chat/', warm_chat_retrieval)
\ No newline at end of file
@@ -1,16 +1,22 @@
+import time
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from models import Job
 from services.job_search_service import JobSearchService
+from services.suggest_service import get_suggest_service
+from services.query_log import get_query_log
+from services.cache_warmer import register_warmer
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 job_search_service = JobSearchService()
+query_log = get_query_log()
 
 @router.get('/ai-search')
 def ai_job_search(
     query: str = Query(..., description='Natural language job search query'),
     limit: int = Query(10, ge=1, le=50, description='Number of jobs to return'),
-    enhance: bool = Query(True, description='Whether to enhance results with LLM insights')
+    enhance: bool = Query(True, description='Whether to enhance results with LLM insights'),
+    group_by_cluster: bool = Query(False, description='Group near-duplicate postings by cluster_id')
 ):
     """
     AI-powered job search using LLM + Typesense.
@@ -21,10 +27,17 @@ def ai_job_search(
     - "Entry level data analyst positions"
     - "Full-time marketing jobs at Google"
     """
+    started = time.time()
+    status = 200
     try:
-        return job_search_service.ai_search(query, limit, enhance)
+        return job_search_service.ai_search(query, limit, enhance, group_by_cluster)
     except Exception as e:
+        status = 500
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        query_log.log('/jobs/ai-search', {
+            'query': query, 'limit': limit, 'enhance': enhance, 'group_by_cluster': group_by_cluster
+        }, status, (time.time() - started) * 1000)
 
 @router.get('/', response_model=List[Job])
 def list_jobs(
@@ -35,8 +48,28 @@ def list_jobs(
     offset: int = Query(0, ge=0)
 ):
     """Traditional job search endpoint (no LLM)"""
+    started = time.time()
+    status = 200
     try:
         return job_search_service.traditional_search(q, company, location, limit, offset)
+    except Exception as e:
+        status = 500
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        query_log.log('/jobs/', {
+            'q': q, 'company': company, 'location': location, 'limit': limit, 'offset': offset
+        }, status, (time.time() - started) * 1000)
+
+@router.get('/suggest')
+def suggest(
+    q: str = Query(..., min_length=1, description='Partial text typed by the user'),
+    field: Optional[str] = Query(None, pattern='^(title|company|location)$', description='Limit suggestions to one field'),
+    limit: int = Query(8, ge=1, le=20),
+    sort_by: str = Query('frequency', pattern='^(frequency|rating)$', description='Rank by job count or average rating')
+):
+    """Typeahead suggestions for job titles, companies and locations"""
+    try:
+        return get_suggest_service().suggest(q, field, limit, sort_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -46,4 +79,12 @@ def get_job(job_id: int):
     try:
         return job_search_service.get_job_by_id(job_id)
     except Exception as e:
-        raise HTTPException(status_code=404, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e)) 
+
+# Replay logged searches to pre-warm the parse and result caches (no LLM enhancement)
+register_warmer('/jobs/', lambda p: job_search_service.traditional_search(
+    p.get('q'), p.get('company'), p.get('location'), p.get('limit', 20), p.get('offset', 0)
+))
+register_warmer('/jobs/ai-search', lambda p: job_search_service.ai_search(
+    p['query'], p.get('limit', 10), False, p.get('group_by_cluster', False)
+))
\ No newline at end of file
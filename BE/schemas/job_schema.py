@@ -9,7 +9,9 @@ JOB_COLLECTION_SCHEMA = {
         {'name': 'source', 'type': 'string', 'facet': True},
         {'name': 'description', 'type': 'string'},
         {'name': 'application_method', 'type': 'string'},
-        {'name': 'posted_date', 'type': 'string'}
+        {'name': 'posted_date', 'type': 'string'},
+        {'name': 'duplicate_count', 'type': 'int32', 'optional': True},
+        {'name': 'cluster_id', 'type': 'string', 'facet': True, 'optional': True}
     ],
     'default_sorting_field': 'job_id'
 } 
\ No newline at end of file
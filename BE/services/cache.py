@@ -0,0 +1,88 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from services.shared_store import SharedStore, get_shared_store
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after ttl seconds.
+
+    With a SharedStore the entries live in the store under the cache name
+    instead, so every worker process reads and fills the same cache.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300,
+                 name: Optional[str] = None, store: Optional[SharedStore] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.store = store
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.store is not None:
+            value = self.store.get(self.name, key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        if self.store is not None:
+            self.store.set(self.name, key, value, self.ttl, self.maxsize)
+            return
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        if self.store is not None:
+            self.store.clear(self.name)
+            return
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        size = self.store.count(self.name) if self.store is not None else len(self._data)
+        return {'size': size, 'maxsize': self.maxsize, 'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses,
+                'shared': self.store is not None}
+
+
+def make_key(*parts: Any) -> str:
+    """Stable cache key for JSON-serializable arguments"""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, maxsize: int = 1024, ttl: float = 300) -> TTLCache:
+    """Named cache, created on first use; shared across workers when shared state is enabled"""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(maxsize, ttl, name, get_shared_store())
+        return _caches[name]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,52 @@
+import os
+import time
+import threading
+from typing import Callable, Dict, Any
+from services.query_log import top_queries
+
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+WARMUP_TOP_N = int(os.getenv('WARMUP_TOP_N', '50'))
+# Only replay queries seen within this window
+WARMUP_LOOKBACK_SECONDS = float(os.getenv('WARMUP_LOOKBACK_HOURS', '168')) * 3600
+
+# endpoint -> func(params) that re-executes a logged request
+_warmers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+_warmup_lock = threading.Lock()
+
+
+def register_warmer(endpoint: str, func: Callable[[Dict[str, Any]], Any]):
+    """Register how to replay logged requests for an endpoint"""
+    _warmers[endpoint] = func
+
+
+def warm_caches(top_n: int = WARMUP_TOP_N) -> Dict[str, Any]:
+    """Pre-execute the most frequent logged queries so parse and result caches are hot"""
+    if not _warmup_lock.acquire(blocking=False):
+        return {'skipped': 'warm-up already running'}
+    try:
+        started = time.time()
+        warmed = 0
+        failed = 0
+        for entry in top_queries(top_n, since=time.time() - WARMUP_LOOKBACK_SECONDS):
+            warmer = _warmers.get(entry['endpoint'])
+            if warmer is None:
+                continue
+            try:
+                warmer(entry['params'])
+                warmed += 1
+            except Exception as e:
+                failed += 1
+                print(f"⚠️ Warm-up failed for {entry['endpoint']} {entry['params']}: {e}")
+        elapsed = time.time() - started
+        if warmed or failed:
+            print(f"🔥 Warmed {warmed} queries in {elapsed:.2f}s ({failed} failed)")
+        return {'warmed': warmed, 'failed': failed, 'elapsed_seconds': round(elapsed, 2)}
+    finally:
+        _warmup_lock.release()
+
+
+def start_warmup(top_n: int = WARMUP_TOP_N):
+    """Warm caches in a background thread"""
+    if not WARMUP_ENABLED:
+        return
+    threading.Thread(target=warm_caches, args=(top_n,), name='cache-warmup', daemon=True).start()
@@ -0,0 +1,281 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from services.shared_store import SharedStore, get_shared_store
+
+CHAT_SESSION_MAX = int(os.getenv('CHAT_SESSION_MAX', '1000'))
+CHAT_SESSION_TTL = float(os.getenv('CHAT_SESSION_TTL', '3600'))
+# Sessions evicted for capacity are spilled here; empty disables the spill
+CHAT_SESSION_DB = os.getenv('CHAT_SESSION_DB', '')
+# Messages (user + assistant) replayed to the model on each turn
+CHAT_HISTORY_WINDOW = int(os.getenv('CHAT_HISTORY_WINDOW', '10'))
+# Job snippets kept per session; the oldest are dropped first
+CHAT_SNIPPET_LIMIT = int(os.getenv('CHAT_SNIPPET_LIMIT', '12'))
+# Retrieval results remembered per session, keyed by normalized message
+CHAT_RETRIEVAL_LIMIT = int(os.getenv('CHAT_RETRIEVAL_LIMIT', '20'))
+
+SNIPPET_DESCRIPTION_CHARS = 100
+
+
+def normalize_query(message: str) -> str:
+    return ' '.join(message.lower().split())
+
+
+def job_snippet(doc: Dict[str, Any]) -> str:
+    return f"{doc.get('title', '')} at {doc.get('company', '')} in {doc.get('location', '')}: {(doc.get('description') or '')[:SNIPPET_DESCRIPTION_CHARS]}..."
+
+
+def job_context_block(context: Dict[str, Any]) -> str:
+    return (
+        f"Job Context:\nTitle: {context.get('title', '')}\n"
+        f"Company: {context.get('company', '')}\n"
+        f"Location: {context.get('location', '')}\n"
+        f"Salary: {context.get('salary', 'N/A')}\n"
+        f"Description: {context.get('description', '')}\n\n"
+    )
+
+
+class ChatSession:
+    """
+    Server-side state of one conversation.
+
+    history is capped to CHAT_HISTORY_WINDOW messages; snippets holds the
+    jobs retrieved so far (job_id -> line) and retrievals maps each searched
+    message to the job_ids it returned, so repeated questions reuse them.
+    The "known jobs" text is appended to as snippets arrive and only rebuilt
+    when an old snippet is dropped.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.history: List[Dict[str, str]] = []
+        self.job_context = ''
+        self.snippets: 'OrderedDict[str, str]' = OrderedDict()
+        self.retrievals: 'OrderedDict[str, List[str]]' = OrderedDict()
+        self.updated_at = time.time()
+        self._jobs_text = ''
+
+    def add_message(self, role: str, content: str):
+        self.history.append({'role': role, 'content': content})
+        if len(self.history) > CHAT_HISTORY_WINDOW:
+            del self.history[:len(self.history) - CHAT_HISTORY_WINDOW]
+
+    def set_job_context(self, context: Optional[Dict[str, Any]]):
+        if context:
+            self.job_context = job_context_block(context)
+
+    def cached_retrieval(self, message: str) -> Optional[List[str]]:
+        """Job ids from an earlier identical search, None if any of their snippets was dropped since"""
+        key = normalize_query(message)
+        job_ids = self.retrievals.get(key)
+        if job_ids is None:
+            return None
+        if any(job_id not in self.snippets for job_id in job_ids):
+            del self.retrievals[key]
+            return None
+        self.retrievals.move_to_end(key)
+        return job_ids
+
+    def add_retrieval(self, message: str, docs: List[Dict[str, Any]]) -> List[str]:
+        """Remember a search result and add snippets for jobs not seen yet"""
+        job_ids = []
+        rebuild = False
+        for doc in docs:
+            job_id = str(doc.get('job_id', doc.get('id')))
+            job_ids.append(job_id)
+            if job_id in self.snippets:
+                continue
+            snippet = job_snippet(doc)
+            self.snippets[job_id] = snippet
+            self._jobs_text += f"- {snippet}\n"
+            if len(self.snippets) > CHAT_SNIPPET_LIMIT:
+                self.snippets.popitem(last=False)
+                rebuild = True
+        if rebuild:
+            self._jobs_text = ''.join(f"- {snippet}\n" for snippet in self.snippets.values())
+
+        self.retrievals[normalize_query(message)] = job_ids
+        while len(self.retrievals) > CHAT_RETRIEVAL_LIMIT:
+            self.retrievals.popitem(last=False)
+        return job_ids
+
+    def build_messages(self, message: str, job_ids: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Prompt for the next turn: bounded history plus the accumulated context"""
+        system = "You are a helpful assistant for job seekers."
+        if self._jobs_text:
+            system += f"\n\nJob listings found earlier in this conversation:\n{self._jobs_text}"
+        messages = [{"role": "system", "content": system}]
+        messages.extend(self.history)
+
+        context = ""
+        current = [self.snippets[job_id] for job_id in (job_ids or []) if job_id in self.snippets]
+        if current:
+            jobs_text = "\n".join(f"{i+1}. {s}" for i, s in enumerate(current))
+            context = f"Here are some job listings found for the user's query:\n{jobs_text}\n\n"
+        messages.append({"role": "user", "content": self.job_context + context + message})
+        return messages
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'history': self.history,
+            'job_context': self.job_context,
+            'snippets': list(self.snippets.items()),
+            'retrievals': list(self.retrievals.items()),
+            'updated_at': self.updated_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ChatSession':
+        session = cls(data['session_id'])
+        session.history = data['history']
+        session.job_context = data['job_context']
+        session.snippets = OrderedDict((job_id, snippet) for job_id, snippet in data['snippets'])
+        session.retrievals = OrderedDict((key, job_ids) for key, job_ids in data['retrievals'])
+        session.updated_at = data['updated_at']
+        session._jobs_text = ''.join(f"- {snippet}\n" for snippet in session.snippets.values())
+        return session
+
+
+class ChatSessionStore:
+    """
+    Bounded in-memory session store with TTL eviction.
+
+    Sessions idle for longer than ttl are dropped. When the store is full,
+    the least recently used session is spilled to SQLite (if db_path is set)
+    and loaded back on its next request.
+
+    With a SharedStore, sessions are kept there instead so that any worker
+    process can serve the next turn; call save() after updating a session.
+    """
+
+    def __init__(self, max_sessions: int = CHAT_SESSION_MAX, ttl: float = CHAT_SESSION_TTL,
+                 db_path: str = CHAT_SESSION_DB, shared: Optional[SharedStore] = None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.db_path = db_path
+        self.shared = shared
+        self._sessions: 'OrderedDict[str, ChatSession]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if db_path and shared is None:
+            db_dir = os.path.dirname(db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            self._connect()
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._connect)
+            with self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chat_sessions (
+                        session_id TEXT PRIMARY KEY,
+                        data TEXT NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                """)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+    def get_or_create(self, session_id: Optional[str] = None) -> ChatSession:
+        """Existing session for session_id, or a new one (under that id if given)"""
+        if self.shared is not None:
+            data = self.shared.get('chat_sessions', session_id) if session_id else None
+            session = ChatSession.from_dict(data) if data else ChatSession(session_id or uuid.uuid4().hex)
+            session.updated_at = time.time()
+            return session
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None and session_id:
+                session = self._load_spilled(session_id)
+            if session is None:
+                session = ChatSession(session_id or uuid.uuid4().hex)
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            session.updated_at = time.time()
+            self._evict()
+            return session
+
+    def save(self, session: ChatSession):
+        """Persist a session updated by a request (in-memory sessions are updated in place)"""
+        if self.shared is not None:
+            self.shared.set('chat_sessions', session.session_id, session.to_dict(), self.ttl, self.max_sessions)
+
+    def delete(self, session_id: str) -> bool:
+        if self.shared is not None:
+            found = self.shared.get('chat_sessions', session_id) is not None
+            self.shared.delete('chat_sessions', session_id)
+            return found
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+            if self._conn is not None:
+                with self._conn:
+                    found = self._conn.execute(
+                        "DELETE FROM chat_sessions WHERE session_id = ?", (session_id,)
+                    ).rowcount > 0 or found
+            return found
+
+    def stats(self) -> Dict[str, Any]:
+        if self.shared is not None:
+            return {'active': self.shared.count('chat_sessions'), 'shared': True,
+                    'max_sessions': self.max_sessions, 'ttl': self.ttl}
+        spilled = 0
+        if self._conn is not None:
+            with self._lock:
+                spilled = self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        return {'active': len(self._sessions), 'spilled': spilled, 'max_sessions': self.max_sessions, 'ttl': self.ttl}
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        # Sessions are kept in last-used order, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.updated_at >= cutoff:
+                break
+            del self._sessions[session_id]
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            _, session = self._sessions.popitem(last=False)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO chat_sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                        (session.session_id, json.dumps(session.to_dict()), session.updated_at)
+                    )
+                    self._conn.execute(
+                        "DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - self.ttl,)
+                    )
+
+    def _load_spilled(self, session_id: str) -> Optional[ChatSession]:
+        if self._conn is None:
+            return None
+        with self._conn:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+        if row[1] < time.time() - self.ttl:
+            return None
+        return ChatSession.from_dict(json.loads(row[0]))
+
+
+_chat_session_store = None
+
+
+def get_chat_session_store() -> ChatSessionStore:
+    """Process-wide ChatSessionStore instance"""
+    global _chat_session_store
+    if _chat_session_store is None:
+        _chat_session_store = ChatSessionStore(shared=get_shared_store())
+    return _chat_session_store
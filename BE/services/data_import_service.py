@@ -1,15 +1,21 @@
 import os
 import json
-import csv
-from datetime import datetime
 from database.typesense_client import TypesenseClient
 from schemas.job_schema import JOB_COLLECTION_SCHEMA
+from services.job_queue import JobCancelled
+from services.job_snapshot import DATA_FILE, SNAPSHOT_DIR, is_snapshot_current, load_snapshot
+from services.dedup import count_job_documents, iter_job_batches
+from services.fallback_search import get_fallback_search
+from services.shared_store import bump_catalog_generation
+from services.market_aggregates import MarketAggregates, get_market_aggregate_service
+from services.suggest_service import SuggestIndexBuilder, get_suggest_service
+from services.job_transform import TRANSFORMED_DIR, count_rows, iter_ndjson_lines, list_shards
 
 class DataImportService:
     def __init__(self):
         self.typesense_client = TypesenseClient()
     
-    def setup_jobs_collection(self):
+    def setup_jobs_collection(self, progress=None):
         """Set up the jobs collection and import data if needed"""
         try:
             # Check if collection exists
@@ -23,94 +29,153 @@ class DataImportService:
                 self.typesense_client.create_collection(JOB_COLLECTION_SCHEMA)
                 print("✅ Collection created successfully")
                 
-                # Import job data
-                self.import_job_data()
-                return True
+                # Import job data; a failed import fails the setup (and a reset-collection job)
+                return self.import_job_data(progress)
                 
+            except JobCancelled:
+                raise
             except Exception as e:
                 print(f"❌ Error creating collection: {e}")
                 return False
     
-    def import_job_data(self):
-        """Import job data from CSV to Typesense"""
-        csv_file = 'data/job.csv'
+    def import_job_data(self, progress=None):
+        """
+        Import job data from the columnar snapshot of the CSV to Typesense.
+
+        If a JobProgress handle is given, rows read, batches sent and
+        per-document failures are reported to it and cancellation is
+        checked between batches.
+        """
+        csv_file = DATA_FILE
         
         print(f"🔍 Looking for job data file: {csv_file}")
         
-        if not os.path.exists(csv_file):
+        if not os.path.exists(csv_file) and not is_snapshot_current(csv_file, SNAPSHOT_DIR):
             print(f"❌ Job data file not found: {csv_file}")
             return False
         
-        file_size = os.path.getsize(csv_file)
-        print(f"📁 Found job data file: {csv_file} ({file_size} bytes)")
+        if os.path.exists(csv_file):
+            file_size = os.path.getsize(csv_file)
+            print(f"📁 Found job data file: {csv_file} ({file_size} bytes)")
         
         try:
-            with open(csv_file, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                rows = list(reader)
-                print(f"📊 Found {len(rows)} rows in CSV file")
-                
-                if len(rows) == 0:
-                    print("❌ CSV file is empty")
-                    return False
-                
-                # Show first row for debugging
-                print(f" Sample row: {dict(rows[0])}")
-                
-                documents = []
-                line_number = 0
-                
-                for row in rows:
-                    line_number += 1
-                    
-                    # Map CSV columns to schema fields
-                    title = row.get('Job Title', '').strip()
-                    company = row.get('Company Name', '').strip()
-                    rating = row.get('Company Ratings', '')
-                    location = row.get('Location', '').strip()
-                    source = row.get('Salary Est', '').strip()
-                    description = row.get('Description', '').strip()
-                    application_method = row.get('Apply Type', '').strip()
-                    
-                    # Convert rating to float if possible
-                    try:
-                        rating_float = float(rating) if rating and rating != 'NoData' else None
-                    except:
-                        rating_float = None
-                    
-                    # Create job record
-                    job_record = {
-                        'job_id': line_number,
-                        'title': title,
-                        'company': company,
-                        'rating': rating_float,
-                        'location': location,
-                        'source': source,
-                        'description': description,
-                        'application_method': application_method,
-                        'posted_date': datetime.now().strftime('%Y-%m-%d')
-                    }
-                    
-                    documents.append(json.dumps(job_record))
-                    
-                    # Import in batches of 100
-                    if len(documents) >= 100:
-                        batch_data = '\n'.join(documents)
-                        self.typesense_client.import_documents(batch_data)
-                        print(f"✅ Imported batch of {len(documents)} jobs")
-                        documents = []
-                
-                # Import remaining documents
-                if documents:
-                    batch_data = '\n'.join(documents)
-                    self.typesense_client.import_documents(batch_data)
-                    print(f"✅ Imported final batch of {len(documents)} jobs")
-                
-                print(f"🎉 Total jobs imported: {line_number}")
-                return True
-                
+            # Parse the CSV once into a columnar snapshot; later imports reuse it
+            snapshot = load_snapshot(csv_file, SNAPSHOT_DIR)
+            print(f"📊 Found {len(snapshot)} rows in job snapshot (ingested {snapshot.ingest_date})")
+            
+            if len(snapshot) == 0:
+                print("❌ CSV file is empty")
+                return False
+            
+            if progress:
+                # Collapsed duplicates are never sent, so count only indexed documents
+                progress.start(total_rows=count_job_documents(snapshot))
+            
+            total = 0
+            suggest_builder = SuggestIndexBuilder()
+            market_aggregates = MarketAggregates()
+            # Near-duplicate reposts are collapsed into one canonical document
+            for batch in iter_job_batches(snapshot, 100):
+                documents = [json.dumps(job_record) for job_record in batch]
+                self._import_batch(documents, progress)
+                suggest_builder.add_documents(batch)
+                market_aggregates.add_documents(batch)
+                total += len(documents)
+                print(f"✅ Imported batch of {len(documents)} jobs")
+            
+            print(f"🎉 Total jobs imported: {total}")
+            self._publish_catalog(suggest_builder, market_aggregates)
+            return True
+            
+        except JobCancelled:
+            print("🛑 Job data import cancelled")
+            raise
         except Exception as e:
             print(f"❌ Error importing job data: {e}")
             import traceback
             traceback.print_exc()
-            return False 
\ No newline at end of file
+            return False 
+    
+    def import_transformed_data(self, progress=None, output_dir=TRANSFORMED_DIR):
+        """
+        Stream NDJSON shards written by transform_job_data.py into Typesense.
+
+        Lines are forwarded as-is (gzip shards are decompressed on the fly);
+        the shards carry the cluster fields when the transform found cached
+        clusters for the feed (see the manifest's dedup entry).
+        Records are only parsed to refresh suggestions and market aggregates.
+        """
+        shards = list_shards(output_dir)
+        if not shards:
+            print(f"❌ No transformed shards found in: {output_dir}")
+            return False
+        
+        print(f"📁 Streaming {len(shards)} transformed shards from {output_dir}")
+        
+        try:
+            if progress:
+                progress.start(total_rows=count_rows(output_dir))
+            
+            documents = []
+            total = 0
+            suggest_builder = SuggestIndexBuilder()
+            market_aggregates = MarketAggregates()
+            for line in iter_ndjson_lines(output_dir):
+                documents.append(line)
+                if len(documents) >= 100:
+                    self._import_transformed_batch(documents, progress, suggest_builder, market_aggregates)
+                    total += len(documents)
+                    documents = []
+            
+            if documents:
+                self._import_transformed_batch(documents, progress, suggest_builder, market_aggregates)
+                total += len(documents)
+            
+            print(f"🎉 Total jobs imported: {total}")
+            self._publish_catalog(suggest_builder, market_aggregates)
+            return True
+            
+        except JobCancelled:
+            print("🛑 Transformed data import cancelled")
+            raise
+        except Exception as e:
+            print(f"❌ Error importing transformed data: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+    
+    def _import_transformed_batch(self, documents, progress, suggest_builder, market_aggregates):
+        self._import_batch(documents, progress)
+        records = [json.loads(line) for line in documents]
+        suggest_builder.add_documents(records)
+        market_aggregates.add_documents(records)
+    
+    def _publish_catalog(self, suggest_builder, market_aggregates):
+        """Swap in the indexes built during an import and tell other workers to reload theirs"""
+        bump_catalog_generation()
+        get_suggest_service().publish(suggest_builder.build())
+        get_market_aggregate_service().publish(market_aggregates)
+        # The snapshot may have been rebuilt; refresh the fallback index lazily
+        get_fallback_search().invalidate()
+    
+    def _import_batch(self, documents, progress=None):
+        """Send one batch of JSON lines to Typesense and report progress"""
+        if progress:
+            progress.check_cancelled()
+            progress.rows(len(documents))
+        
+        response = self.typesense_client.import_documents('\n'.join(documents))
+        failures = self._count_failures(response)
+        if failures:
+            print(f"⚠️ {failures} documents failed to import in this batch")
+        
+        if progress:
+            progress.batch(len(documents), failures)
+    
+    def _count_failures(self, response):
+        """Count failed documents in a Typesense import response"""
+        if isinstance(response, str):
+            results = [json.loads(line) for line in response.splitlines() if line.strip()]
+        else:
+            results = response or []
+        return sum(1 for result in results if not result.get('success', False))
\ No newline at end of file
@@ -0,0 +1,269 @@
+import os
+import re
+import time
+import zlib
+import operator
+from array import array
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from services.job_snapshot import JobSnapshot
+
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+# collapse: index one canonical document per cluster; tag: index every posting with its cluster_id
+DEDUP_MODE = os.getenv('DEDUP_MODE', 'collapse')
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.8'))
+DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', '128'))
+SHINGLE_SIZE = 5
+# Chance that a pair exactly at the threshold is compared; the exact check drops false positives
+LSH_RECALL = 0.95
+
+_MAX_HASH = 0xFFFFFFFF
+_WORD_RE = re.compile(r'\w+')
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Stable 32-bit hashes of the word n-gram shingles of a text"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(hashes: set, num_perm: int = DEDUP_NUM_PERM) -> Optional[array]:
+    """
+    One-permutation MinHash signature.
+
+    Each shingle hash is mixed once and routed to one of num_perm bins by
+    its low bits; each bin keeps its minimum. Empty bins are filled from
+    the next non-empty bin (rotation densification), so the cost is
+    O(shingles) instead of O(shingles * num_perm).
+    """
+    if not hashes:
+        return None
+    bins = [_MAX_HASH + 1] * num_perm
+    for h in hashes:
+        # Multiplicative mixing so sequential crc values spread over the bins
+        mixed = (h * 0x9E3779B1 + 0x7F4A7C15) & _MAX_HASH
+        bucket = mixed % num_perm
+        value = mixed // num_perm
+        if value < bins[bucket]:
+            bins[bucket] = value
+    if any(v > _MAX_HASH for v in bins):
+        filled = list(bins)
+        for i in range(num_perm):
+            offset = 1
+            while filled[i] > _MAX_HASH:
+                source = bins[(i + offset) % num_perm]
+                if source <= _MAX_HASH:
+                    filled[i] = source + offset * (_MAX_HASH // num_perm)
+                offset += 1
+        bins = filled
+    # Filled values stay below num_perm * (_MAX_HASH // num_perm + 1), so they fit 32 bits
+    return array('I', bins)
+
+
+def estimate_jaccard(a: array, b: array) -> float:
+    return sum(map(operator.eq, a, b)) / len(a)
+
+
+def _candidate_probability(similarity: float, bands: int, rows: int) -> float:
+    """Probability that two signatures with this Jaccard similarity share at least one band"""
+    return 1 - (1 - similarity ** rows) ** bands
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = LSH_RECALL) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm.
+
+    Pairs at the threshold must become candidates with at least `recall`
+    probability (which puts the S-curve midpoint below the threshold);
+    among those, the one with the fewest false-positive candidates below
+    the threshold wins. If none qualifies, the highest recall wins.
+    """
+    steps = 100
+    best, best_cost = (num_perm, 1), None
+    for rows in range(1, num_perm + 1):
+        for bands in range(1, num_perm // rows + 1):
+            probability = _candidate_probability(threshold, bands, rows)
+            if probability < recall:
+                cost = (1, -probability)
+            else:
+                # Area under the S-curve below the threshold, by the midpoint rule
+                cost = (0, sum(_candidate_probability(threshold * (i + 0.5) / steps, bands, rows)
+                               for i in range(steps)) * threshold / steps)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = (bands, rows), cost
+    return best
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures for sub-linear candidate lookup.
+
+    Each band is keyed by a single hash of its slice of the signature, and
+    a bucket holds a bare int until a second key lands in it, so the index
+    costs one dict entry per band per inserted signature.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM):
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.buckets: List[Dict[int, Any]] = [{} for _ in range(self.bands)]
+
+    def _band_keys(self, signature: array):
+        for band in range(self.bands):
+            yield band, hash(signature[band * self.rows:(band + 1) * self.rows].tobytes())
+
+    def insert(self, key: int, signature: array):
+        for band, band_key in self._band_keys(signature):
+            bucket = self.buckets[band]
+            existing = bucket.get(band_key)
+            if existing is None:
+                bucket[band_key] = key
+            elif isinstance(existing, int):
+                bucket[band_key] = [existing, key]
+            else:
+                existing.append(key)
+
+    def candidates(self, signature: array) -> set:
+        found = set()
+        for band, band_key in self._band_keys(signature):
+            existing = self.buckets[band].get(band_key)
+            if existing is None:
+                continue
+            if isinstance(existing, int):
+                found.add(existing)
+            else:
+                found.update(existing)
+        return found
+
+
+class DuplicateClusters:
+    """
+    Near-duplicate clusters over the rows of a job snapshot.
+
+    canonical[row] is the row index of the cluster's canonical posting (the
+    first one seen); sizes[row] is the cluster size for canonical rows.
+    """
+
+    def __init__(self, canonical: array, threshold: float = DEDUP_THRESHOLD, mode: str = DEDUP_MODE):
+        self.canonical = canonical
+        self.threshold = threshold
+        self.mode = mode
+        self.sizes = array('I', [0] * len(canonical))
+        for row in canonical:
+            self.sizes[row] += 1
+
+    def __len__(self):
+        return len(self.canonical)
+
+    @property
+    def cluster_count(self) -> int:
+        return sum(1 for row, canonical in enumerate(self.canonical) if row == canonical)
+
+    def is_canonical(self, row: int) -> bool:
+        return self.canonical[row] == row
+
+    def is_visible(self, row: int) -> bool:
+        """Whether the row is indexed at all in the current mode"""
+        return self.mode != 'collapse' or self.canonical[row] == row
+
+    def annotate(self, record: Dict[str, Any], row: int) -> Dict[str, Any]:
+        canonical = self.canonical[row]
+        record['cluster_id'] = f"c{canonical + 1}"
+        record['duplicate_count'] = self.sizes[canonical] - 1
+        return record
+
+    def iter_batches(self, snapshot: JobSnapshot, batch_size: int = 100) -> Iterator[List[Dict[str, Any]]]:
+        """Snapshot batches annotated with cluster fields, duplicates dropped in collapse mode"""
+        pending = []
+        row = 0
+        for batch in snapshot.iter_batches(batch_size):
+            for record in batch:
+                if self.is_visible(row):
+                    pending.append(self.annotate(record, row))
+                row += 1
+            if len(pending) >= batch_size:
+                yield pending
+                pending = []
+        if pending:
+            yield pending
+
+
+def find_clusters(snapshot: JobSnapshot, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM) -> array:
+    """Assign every snapshot row to a near-duplicate cluster by description similarity"""
+    started = time.time()
+    lsh = LSHIndex(threshold, num_perm)
+    # Signatures of canonical rows, back to back: slot i is signatures[i * num_perm:(i + 1) * num_perm]
+    signatures = array('I')
+    slot_rows = array('i')
+    canonical = array('i', range(len(snapshot)))
+    descriptions = snapshot.strings['description']
+
+    for start in range(0, len(snapshot), 1000):
+        stop = min(start + 1000, len(snapshot))
+        for offset, text in enumerate(descriptions.slice(start, stop)):
+            row = start + offset
+            signature = minhash_signature(shingle_hashes(text), num_perm)
+            if signature is None:
+                continue
+            best, best_score = None, threshold
+            for slot in lsh.candidates(signature):
+                score = estimate_jaccard(signature, signatures[slot * num_perm:(slot + 1) * num_perm])
+                if score >= best_score:
+                    best, best_score = slot_rows[slot], score
+            if best is None:
+                lsh.insert(len(slot_rows), signature)
+                slot_rows.append(row)
+                signatures.extend(signature)
+            else:
+                canonical[row] = best
+
+    duplicates = sum(1 for row, c in enumerate(canonical) if row != c)
+    print(f"🧬 Found {duplicates} near-duplicate postings in {len(snapshot)} jobs ({time.time() - started:.2f}s)")
+    return canonical
+
+
+def load_clusters(snapshot: JobSnapshot, threshold: float = DEDUP_THRESHOLD,
+                  num_perm: int = DEDUP_NUM_PERM, mode: str = DEDUP_MODE,
+                  compute: bool = True) -> Optional[DuplicateClusters]:
+    """
+    Get the clusters for a snapshot, cached next to it.
+
+    The cache is keyed by threshold and LSH layout and lives in the
+    snapshot directory, so it is discarded whenever the snapshot is rebuilt.
+    """
+    bands, rows = lsh_params(threshold, num_perm)
+    cache_path = os.path.join(snapshot.snapshot_dir, f"clusters-{threshold:g}-{num_perm}-{bands}x{rows}.i32")
+    if os.path.exists(cache_path):
+        canonical = array('i')
+        with open(cache_path, 'rb') as f:
+            canonical.fromfile(f, len(snapshot))
+        return DuplicateClusters(canonical, threshold, mode)
+    if not compute:
+        return None
+
+    canonical = find_clusters(snapshot, threshold, num_perm)
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        canonical.tofile(f)
+    os.replace(tmp_path, cache_path)
+    return DuplicateClusters(canonical, threshold, mode)
+
+
+def count_job_documents(snapshot: JobSnapshot, compute: bool = True) -> int:
+    """Number of documents iter_job_batches() yields for the snapshot"""
+    clusters = load_clusters(snapshot, compute=compute) if DEDUP_ENABLED else None
+    if clusters is None or clusters.mode != 'collapse':
+        return len(snapshot)
+    return clusters.cluster_count
+
+
+def iter_job_batches(snapshot: JobSnapshot, batch_size: int = 100, compute: bool = True) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Batches of the documents that get indexed: deduplicated and annotated
+    when dedup is enabled, plain snapshot records otherwise. With
+    compute=False, clusters are only used if already cached.
+    """
+    clusters = load_clusters(snapshot, compute=compute) if DEDUP_ENABLED else None
+    if clusters is None:
+        return snapshot.iter_batches(batch_size)
+    return clusters.iter_batches(snapshot, batch_size)
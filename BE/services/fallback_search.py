@@ -0,0 +1,411 @@
+import os
+import re
+import math
+import time
+import bisect
+import threading
+from array import array
+from typing import Dict, Any, List, Optional, Set, Tuple
+from typesense import exceptions as typesense_exceptions
+from services.dedup import DEDUP_ENABLED, DuplicateClusters, load_clusters
+from services.job_snapshot import DATA_FILE, SNAPSHOT_DIR, JobSnapshot, load_snapshot
+from services.shared_store import catalog_generation
+
+# How long to skip Typesense after a connection failure before retrying it
+FALLBACK_RETRY_SECONDS = float(os.getenv('FALLBACK_RETRY_SECONDS', '30'))
+
+TEXT_FIELDS = ('title', 'company', 'description')
+EXACT_FILTER_FIELDS = ('company', 'location', 'source')
+FIELD_WEIGHTS = {'title': 3.0, 'company': 2.0, 'description': 1.0}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 20
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Errors that mean Typesense answered (4xx) or is misconfigured; only other errors fall back
+_CLIENT_ERRORS = (
+    typesense_exceptions.ConfigError,
+    typesense_exceptions.RequestMalformed,
+    typesense_exceptions.RequestUnauthorized,
+    typesense_exceptions.RequestForbidden,
+    typesense_exceptions.ObjectNotFound,
+    typesense_exceptions.ObjectAlreadyExists,
+    typesense_exceptions.ObjectUnprocessable,
+    typesense_exceptions.InvalidParameter
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class FieldIndex:
+    """Inverted index for one text field with array-backed postings"""
+
+    def __init__(self):
+        self.postings: Dict[str, tuple] = {}
+        self.doc_lengths = array('I')
+        self.total_length = 0
+        self.doc_count = 0
+        self.vocabulary: List[str] = []
+
+    def add(self, doc: int, text: str):
+        tokens = tokenize(text)
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        self.doc_count += 1
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            entry = self.postings.get(token)
+            if entry is None:
+                entry = self.postings[token] = (array('I'), array('H'))
+            entry[0].append(doc)
+            entry[1].append(min(count, 65535))
+
+    def skip(self, doc: int):
+        """Reserve doc's slot without indexing it or counting it in the length statistics"""
+        self.doc_lengths.append(0)
+
+    def finalize(self):
+        self.vocabulary = sorted(self.postings)
+
+    @property
+    def avg_length(self) -> float:
+        return self.total_length / self.doc_count if self.doc_count else 0.0
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with prefix, via binary search"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+
+class LocalSearchIndex:
+    """
+    Embedded BM25 search over the job snapshot.
+
+    Accepts the subset of Typesense search parameters this service uses
+    (q, query_by, filter_by, sort_by, facet_by, group_by, per_page, page) and
+    returns results in the Typesense response shape, so callers cannot tell
+    the two apart. Near-duplicates collapsed at import are hidden here too.
+    """
+
+    def __init__(self, snapshot: JobSnapshot, clusters: Optional[DuplicateClusters] = None):
+        self.snapshot = snapshot
+        self.clusters = clusters
+        self.hidden: Set[int] = set()
+        self.fields = {name: FieldIndex() for name in TEXT_FIELDS}
+        self.exact: Dict[str, Dict[str, array]] = {name: {} for name in EXACT_FILTER_FIELDS}
+
+        started = time.time()
+        doc = 0
+        for batch in snapshot.iter_batches(1000):
+            for record in batch:
+                if clusters is not None and not clusters.is_visible(doc):
+                    # Keep doc numbering aligned with snapshot rows, but index nothing
+                    self.hidden.add(doc)
+                    for field_index in self.fields.values():
+                        field_index.skip(doc)
+                    doc += 1
+                    continue
+                for name, field_index in self.fields.items():
+                    field_index.add(doc, record[name])
+                for name, values in self.exact.items():
+                    postings = values.get(record[name])
+                    if postings is None:
+                        postings = values[record[name]] = array('I')
+                    postings.append(doc)
+                doc += 1
+        for field_index in self.fields.values():
+            field_index.finalize()
+        print(f"🗂️ Built local search index over {len(self)} jobs in {time.time() - started:.2f}s")
+
+    def __len__(self):
+        """Searchable documents: snapshot rows minus hidden duplicates"""
+        return len(self.snapshot) - len(self.hidden)
+
+    def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.time()
+        query = (params.get('q') or '*').strip()
+        query_by = [f.strip() for f in params.get('query_by', ','.join(TEXT_FIELDS)).split(',') if f.strip() in self.fields]
+        per_page = int(params.get('per_page', 10))
+        page = max(int(params.get('page', 1)), 1)
+
+        allowed = self._apply_filters(params.get('filter_by'))
+
+        if query == '*' or not tokenize(query):
+            scores = None
+            candidates = self._visible_docs() if allowed is None else sorted(allowed)
+        else:
+            scores = self._score(tokenize(query), query_by or list(TEXT_FIELDS), allowed)
+            candidates = list(scores)
+
+        ordered = self._sort(candidates, scores, params.get('sort_by'))
+
+        response = {
+            'found': len(ordered),
+            'out_of': len(self),
+            'page': page,
+            'search_time_ms': 0,
+            'request_params': {'q': query, 'per_page': per_page}
+        }
+        if params.get('group_by'):
+            groups = self._group(ordered, params['group_by'])
+            response['found'] = len(groups)
+            response['found_docs'] = len(ordered)
+            response['grouped_hits'] = [
+                {
+                    'group_key': [key],
+                    'found': len(group_docs),
+                    'hits': [self._hit(doc, scores) for doc in group_docs[:int(params.get('group_limit', 3))]]
+                }
+                for key, group_docs in groups[(page - 1) * per_page:page * per_page]
+            ]
+        else:
+            response['hits'] = [self._hit(doc, scores) for doc in ordered[(page - 1) * per_page:page * per_page]]
+        response['search_time_ms'] = int((time.time() - started) * 1000)
+        if params.get('facet_by'):
+            response['facet_counts'] = self._facet_counts(ordered, params['facet_by'], int(params.get('max_facet_values', 10)))
+        return response
+
+    def _visible_docs(self) -> List[int]:
+        return [doc for doc in range(len(self.snapshot)) if doc not in self.hidden]
+
+    def _record(self, doc: int) -> Dict[str, Any]:
+        record = self.snapshot.record(doc)
+        if self.clusters is not None:
+            self.clusters.annotate(record, doc)
+        return record
+
+    def _hit(self, doc: int, scores: Optional[Dict[int, float]]) -> Dict[str, Any]:
+        hit = {'document': self._record(doc)}
+        if scores is not None:
+            hit['text_match'] = round(scores[doc], 4)
+        return hit
+
+    def _field_value(self, doc: int, field: str) -> str:
+        if field == 'cluster_id':
+            canonical = self.clusters.canonical[doc] if self.clusters is not None else doc
+            return f"c{canonical + 1}"
+        if field in self.snapshot.strings:
+            return self.snapshot.strings[field][doc]
+        return ''
+
+    def _group(self, docs: List[int], group_by: str) -> List[tuple]:
+        """Group ordered docs by field value, groups ordered by their best doc"""
+        groups: Dict[str, List[int]] = {}
+        for doc in docs:
+            groups.setdefault(self._field_value(doc, group_by.strip()), []).append(doc)
+        return list(groups.items())
+
+    def _facet_counts(self, docs: List[int], facet_by: str, max_values: int) -> List[Dict[str, Any]]:
+        """Value counts over every matching document, like Typesense facets"""
+        facet_counts = []
+        for field in (f.strip() for f in facet_by.split(',')):
+            if field not in self.snapshot.strings and field != 'cluster_id':
+                continue
+            counts: Dict[str, int] = {}
+            for doc in docs:
+                value = self._field_value(doc, field)
+                counts[value] = counts.get(value, 0) + 1
+            top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:max_values]
+            facet_counts.append({
+                'field_name': field,
+                'counts': [{'value': value, 'count': count, 'highlighted': value} for value, count in top],
+                'stats': {'total_values': len(counts)}
+            })
+        return facet_counts
+
+    def get_document(self, job_id: int) -> Dict[str, Any]:
+        job_ids = self.snapshot.job_id
+        doc = bisect.bisect_left(job_ids, int(job_id))
+        if doc >= len(job_ids) or job_ids[doc] != int(job_id) or doc in self.hidden:
+            raise typesense_exceptions.ObjectNotFound(f"Could not find a document with id: {job_id}")
+        return self._record(doc)
+
+    def _score(self, tokens: List[str], query_by: List[str], allowed: Optional[Set[int]]) -> Dict[int, float]:
+        """BM25 summed over fields, with the last token matched as a prefix"""
+        scores: Dict[int, float] = {}
+        total_docs = len(self)
+        for name in query_by:
+            field_index = self.fields[name]
+            avg_length = field_index.avg_length or 1.0
+            weight = FIELD_WEIGHTS.get(name, 1.0)
+            for position, token in enumerate(tokens):
+                terms = [token]
+                if position == len(tokens) - 1:
+                    terms = field_index.expand_prefix(token) or terms
+                for term in terms:
+                    entry = field_index.postings.get(term)
+                    if entry is None:
+                        continue
+                    docs, freqs = entry
+                    idf = math.log(1 + (total_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for doc, tf in zip(docs, freqs):
+                        if allowed is not None and doc not in allowed:
+                            continue
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * field_index.doc_lengths[doc] / avg_length)
+                        scores[doc] = scores.get(doc, 0.0) + weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def _apply_filters(self, filter_by: Optional[str]) -> Optional[Set[int]]:
+        """Evaluate `field:=value`, `field:!=value` and `field:value` clauses joined by &&"""
+        if not filter_by:
+            return None
+        allowed = None
+        for clause in filter_by.split('&&'):
+            match = re.match(r'\s*(\w+)\s*:\s*(!?=)?\s*(.*?)\s*$', clause)
+            if not match:
+                continue
+            field, operator, raw_value = match.groups()
+            values = [v.strip().strip('`') for v in raw_value.strip('[]').split(',')] if raw_value.startswith('[') else [raw_value.strip('`')]
+            matched = self._match_values(field, values, exact=bool(operator))
+            if operator == '!=':
+                matched = set(self._visible_docs()) - matched
+            allowed = matched if allowed is None else allowed & matched
+        return allowed
+
+    def _match_values(self, field: str, values: List[str], exact: bool) -> Set[int]:
+        matched: Set[int] = set()
+        if exact and field in self.exact:
+            for value in values:
+                matched.update(self.exact[field].get(value, ()))
+            return matched
+
+        if field not in self.snapshot.strings:
+            return matched
+        column = self.snapshot.strings[field]
+        for doc in self._visible_docs():
+            text = column[doc]
+            for value in values:
+                if (text == value) if exact else set(tokenize(value)) <= set(tokenize(text)):
+                    matched.add(doc)
+                    break
+        return matched
+
+    def _sort(self, docs: List[int], scores: Optional[Dict[int, float]], sort_by: Optional[str]) -> List[int]:
+        """Order by sort_by like Typesense, defaulting to text match then job_id desc"""
+        job_ids = self.snapshot.job_id
+        spec = [s.strip() for s in (sort_by or '').split(',') if s.strip()]
+        if not spec:
+            spec = ['_text_match:desc', 'job_id:desc'] if scores is not None else ['job_id:desc']
+
+        # Apply keys from least to most significant; Python's sort is stable
+        for item in reversed(spec):
+            field, _, direction = item.partition(':')
+            reverse = direction.lower() != 'asc'
+            if field == '_text_match':
+                if scores is not None:
+                    docs.sort(key=lambda d: scores[d], reverse=reverse)
+            elif field == 'job_id':
+                docs.sort(key=lambda d: job_ids[d], reverse=reverse)
+            elif field == 'rating':
+                ratings = self.snapshot.rating
+                docs.sort(key=lambda d: -math.inf if math.isnan(ratings[d]) else ratings[d], reverse=reverse)
+            elif field in self.snapshot.strings:
+                column = self.snapshot.strings[field]
+                docs.sort(key=lambda d: column[d], reverse=reverse)
+        return docs
+
+
+class FallbackSearch:
+    """
+    Routes reads to Typesense and falls back to the local index when it is
+    unreachable. After a connection failure Typesense is skipped for
+    FALLBACK_RETRY_SECONDS so degraded requests do not each pay a timeout.
+    """
+
+    def __init__(self, csv_path: str = DATA_FILE, snapshot_dir: str = SNAPSHOT_DIR):
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self._index: Optional[LocalSearchIndex] = None
+        self._generation = catalog_generation()
+        self._lock = threading.Lock()
+        self.typesense_down_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def degraded(self) -> bool:
+        return time.time() < self.typesense_down_until
+
+    def index(self) -> Optional[LocalSearchIndex]:
+        """Get the local index, building it from the snapshot on first use"""
+        generation = catalog_generation()
+        if generation != self._generation:
+            # Another worker reindexed; rebuild from the new snapshot
+            self._index = None
+            self._generation = generation
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    snapshot = load_snapshot(self.csv_path, self.snapshot_dir)
+                    if snapshot is not None:
+                        clusters = load_clusters(snapshot, compute=False) if DEDUP_ENABLED else None
+                        self._index = LocalSearchIndex(snapshot, clusters)
+        return self._index
+
+    def invalidate(self):
+        """Drop the local index so it is rebuilt from the next snapshot"""
+        with self._lock:
+            self._index = None
+
+    def search_documents(self, typesense_client, search_params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Search Typesense, or the local index when it is unreachable.
+
+        Returns (results, served_locally). Only connection failures, timeouts
+        and 5xx responses fall back; client errors are raised. That includes
+        ObjectNotFound for a missing collection: Typesense is up and has no
+        catalog yet (e.g. during setup), and the snapshot must not stand in
+        for an index that was never built.
+        """
+        if not self.degraded:
+            try:
+                return typesense_client.search_documents(search_params), False
+            except _CLIENT_ERRORS:
+                raise
+            except Exception as e:
+                self._primary_failed(e)
+        return self._local_or_raise().search(search_params), True
+
+    def get_document(self, typesense_client, doc_id) -> Dict[str, Any]:
+        if not self.degraded:
+            try:
+                return typesense_client.get_document(doc_id)
+            except _CLIENT_ERRORS:
+                # Typesense answered (e.g. the job is not indexed); the local
+                # index must not contradict it
+                raise
+            except Exception as e:
+                self._primary_failed(e)
+        return self._local_or_raise().get_document(doc_id)
+
+    def _primary_failed(self, error: Exception):
+        self.last_error = str(error)
+        self.typesense_down_until = time.time() + FALLBACK_RETRY_SECONDS
+        print(f"⚠️ Typesense unreachable ({error}); serving reads from local index for {FALLBACK_RETRY_SECONDS:.0f}s")
+
+    def _local_or_raise(self) -> LocalSearchIndex:
+        index = self.index()
+        if index is None:
+            raise Exception(f"Typesense unavailable and no local job data for fallback: {self.last_error}")
+        return index
+
+
+_fallback_search = None
+
+
+def get_fallback_search() -> FallbackSearch:
+    """Process-wide FallbackSearch instance"""
+    global _fallback_search
+    if _fallback_search is None:
+        _fallback_search = FallbackSearch()
+    return _fallback_search
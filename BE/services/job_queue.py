@@ -0,0 +1,368 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+JOB_QUEUE_DB = os.getenv('JOB_QUEUE_DB', 'data/admin_jobs.db')
+
+# Minimum interval between progress writes to SQLite (seconds)
+PROGRESS_FLUSH_INTERVAL = 0.5
+# How often an idle runner looks for jobs submitted by other processes (seconds)
+JOB_POLL_INTERVAL = 1.0
+# A running job's owner refreshes heartbeat_at this often; rows silent for
+# JOB_HEARTBEAT_TIMEOUT belong to a dead worker and are failed (seconds)
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '5'))
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv('JOB_HEARTBEAT_TIMEOUT', '60'))
+
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+FINAL_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised inside a running task when its job has been cancelled"""
+    pass
+
+
+class JobProgress:
+    """Progress handle handed to a running task"""
+
+    def __init__(self, job_queue: 'JobQueue', job_id: str, cancel_event: threading.Event):
+        self.job_queue = job_queue
+        self.job_id = job_id
+        self.cancel_event = cancel_event
+        self.started_at = time.time()
+        self.total_rows = None
+        self.rows_read = 0
+        self.docs_sent = 0
+        self.batches_sent = 0
+        self.failures = 0
+        self._last_flush = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested"""
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def start(self, total_rows: Optional[int] = None):
+        """Reset the counters for a new pass over the data"""
+        self.started_at = time.time()
+        self.total_rows = total_rows
+        self.rows_read = 0
+        self.docs_sent = 0
+        self.batches_sent = 0
+        self.failures = 0
+        self.flush(force=True)
+
+    def rows(self, count: int):
+        """Record rows read from the source"""
+        self.rows_read += count
+        self.flush()
+
+    def batch(self, docs: int, failures: int = 0):
+        """Record a batch sent to Typesense"""
+        self.batches_sent += 1
+        self.docs_sent += docs
+        self.failures += failures
+        self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current progress as a plain dict"""
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        docs_per_sec = self.docs_sent / elapsed
+        eta_seconds = None
+        if self.total_rows and docs_per_sec > 0:
+            remaining = max(self.total_rows - self.docs_sent, 0)
+            eta_seconds = round(remaining / docs_per_sec, 1)
+        return {
+            'total_rows': self.total_rows,
+            'rows_read': self.rows_read,
+            'docs_sent': self.docs_sent,
+            'batches_sent': self.batches_sent,
+            'failures': self.failures,
+            'docs_per_sec': round(docs_per_sec, 1),
+            'elapsed_seconds': round(elapsed, 1),
+            'eta_seconds': eta_seconds
+        }
+
+    def flush(self, force: bool = False):
+        """Persist progress, throttled to avoid a write per row"""
+        now = time.time()
+        if not force and now - self._last_flush < PROGRESS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        self.job_queue._update(self.job_id, progress=self.snapshot())
+        # Cancellation may have been requested from another worker process
+        if not self.cancel_event.is_set() and self.job_queue._status(self.job_id) == 'cancelling':
+            self.cancel_event.set()
+
+
+class JobQueue:
+    """
+    In-process background job runner persisted to SQLite.
+
+    Jobs are executed one at a time by a daemon worker thread so that long
+    running admin tasks (imports, collection resets) never block a request.
+    Runners claim queued jobs through SQLite, so with several worker
+    processes a job submitted to one may run in another, and still only one
+    job runs at a time. Jobs that were queued or running when the server
+    stopped are re-queued by recover() on the next start.
+    """
+
+    def __init__(self, db_path: str = JOB_QUEUE_DB):
+        self.db_path = db_path
+        self.tasks: Dict[str, Callable] = {}
+        self._wakeup = threading.Event()
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._worker = None
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._connect()
+        if hasattr(os, 'register_at_fork'):
+            # SQLite connections must not be shared with forked worker processes
+            os.register_at_fork(after_in_child=self._connect)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    owner_pid INTEGER,
+                    heartbeat_at REAL
+                )
+            """)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (('owner_pid', 'INTEGER'), ('heartbeat_at', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+    def register(self, kind: str, func: Callable):
+        """Register a task function: func(progress, **params) -> result"""
+        self.tasks[kind] = func
+
+    def recover(self):
+        """Re-queue jobs interrupted by a restart; call once per server start, before any runner starts"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status FROM jobs WHERE status IN (?, ?, ?) ORDER BY created_at",
+                ACTIVE_STATUSES
+            ).fetchall()
+        for row in rows:
+            if row['status'] == 'cancelling':
+                self._update(row['id'], status='cancelled', finished_at=_now())
+                continue
+            print(f"♻️ Re-queueing interrupted job {row['id']}")
+            self._update(row['id'], status='queued', started_at=None)
+
+    def start(self):
+        """Start the worker thread"""
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._run, name='job-queue-worker', daemon=True)
+        self._worker.start()
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue a job and return its record immediately"""
+        if kind not in self.tasks:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, progress, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params or {}), 'queued', json.dumps({}), _now())
+            )
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record by ID"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """List the most recent jobs"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Request cancellation of a queued or running job"""
+        # A job only moves forward (queued -> running -> final), so each
+        # transition is conditional on the status just read and is retried
+        # from the new status if another worker moved the job in between
+        for _ in range(len(ACTIVE_STATUSES)):
+            job = self.get(job_id)
+            if job is None or job['status'] in FINAL_STATUSES or job['status'] == 'cancelling':
+                return job
+            if job['status'] == 'queued':
+                if self._update(job_id, expected_status='queued', status='cancelled', finished_at=_now()):
+                    break
+            elif self._update(job_id, expected_status='running', status='cancelling'):
+                event = self._cancel_events.get(job_id)
+                if event is not None:
+                    event.set()
+                break
+        return self.get(job_id)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(JOB_POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                job = self._claim_next()
+                while job is not None:
+                    self._execute(job)
+                    job = self._claim_next()
+            except Exception as e:
+                print(f"⚠️ Job queue runner error: {e}")
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically mark the oldest queued job running, unless a job is already running anywhere"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._reap_orphans()
+                busy = self._conn.execute(
+                    "SELECT 1 FROM jobs WHERE status IN ('running', 'cancelling') LIMIT 1"
+                ).fetchone()
+                row = None if busy else self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, owner_pid = ?, heartbeat_at = ? WHERE id = ?",
+                        (_now(), os.getpid(), time.time(), row['id'])
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return self.get(row['id']) if row is not None else None
+
+    def _reap_orphans(self):
+        """
+        Close out running jobs whose worker process died (crash, OOM, timeout
+        kill). They are failed rather than re-queued so a job that kills its
+        worker cannot loop; a cancelling job just becomes cancelled.
+        Called inside the claim transaction.
+        """
+        rows = self._conn.execute(
+            "SELECT id, status, owner_pid, heartbeat_at FROM jobs WHERE status IN ('running', 'cancelling')"
+        ).fetchall()
+        stale_before = time.time() - JOB_HEARTBEAT_TIMEOUT
+        for row in rows:
+            alive = row['owner_pid'] is not None and _process_alive(row['owner_pid'])
+            if alive and (row['heartbeat_at'] or 0) >= stale_before:
+                continue
+            print(f"🧟 Job {row['id']} lost its worker (pid {row['owner_pid']})")
+            if row['status'] == 'cancelling':
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?", (_now(), row['id'])
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    (f"Worker process {row['owner_pid']} died or stopped sending heartbeats", _now(), row['id'])
+                )
+
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        while not done.wait(JOB_HEARTBEAT_INTERVAL):
+            try:
+                self._update(job_id, heartbeat_at=time.time())
+            except Exception as e:
+                print(f"⚠️ Job {job_id} heartbeat failed: {e}")
+
+    def _execute(self, job: Dict[str, Any]):
+        job_id = job['id']
+        cancel_event = self._cancel_events.setdefault(job_id, threading.Event())
+        progress = JobProgress(self, job_id, cancel_event)
+        print(f"🏃 Running job {job_id} ({job['kind']})")
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, done), name='job-heartbeat', daemon=True).start()
+
+        try:
+            progress.check_cancelled()
+            result = self.tasks[job['kind']](progress, **job['params'])
+            progress.flush(force=True)
+            if result is False:
+                self._update(job_id, status='failed', error=f"{job['kind']} failed", finished_at=_now())
+            else:
+                self._update(job_id, status='succeeded', result=result, finished_at=_now())
+            print(f"✅ Job {job_id} finished")
+        except JobCancelled:
+            progress.flush(force=True)
+            self._update(job_id, status='cancelled', finished_at=_now())
+            print(f"🛑 Job {job_id} cancelled")
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status='failed', error=str(e), finished_at=_now())
+            print(f"❌ Job {job_id} failed: {e}")
+        finally:
+            done.set()
+            self._cancel_events.pop(job_id, None)
+
+    def _status(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row['status'] if row else None
+
+    def _update(self, job_id: str, expected_status: Optional[str] = None, **fields) -> bool:
+        """Write fields, only if the job is still in expected_status when given; True if a row changed"""
+        for key in ('progress', 'result'):
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+        assignments = ', '.join(f"{key} = ?" for key in fields)
+        query = f"UPDATE jobs SET {assignments} WHERE id = ?"
+        params = (*fields.values(), job_id)
+        if expected_status is not None:
+            query += " AND status = ?"
+            params += (expected_status,)
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount > 0
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    job['progress'] = json.loads(job['progress'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
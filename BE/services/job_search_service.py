@@ -1,18 +1,35 @@
+import os
 from typing import List, Optional, Dict, Any
 from database.typesense_client import TypesenseClient
 from models import Job
+from schemas.job_schema import JOB_COLLECTION_SCHEMA
 from services.llm_query_parser import LLMQueryParser
 from services.llm_result_analyzer import LLMResultAnalyzer
+from services.fallback_search import get_fallback_search
+from services.market_aggregates import get_market_aggregate_service
+from services.cache import get_cache, make_key
+
+# Postings returned per cluster when grouping ai_search results
+CLUSTER_GROUP_LIMIT = 3
+
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '120'))
 
 class JobSearchService:
     def __init__(self):
         self.typesense_client = TypesenseClient()
         self.llm_parser = LLMQueryParser()
         self.llm_analyzer = LLMResultAnalyzer()
+        self.fallback_search = get_fallback_search()
+        self.market_aggregates = get_market_aggregate_service()
+        self.result_cache = get_cache('search_results', maxsize=2048, ttl=RESULT_CACHE_TTL)
     
-    def ai_search(self, query: str, limit: int = 10, enhance: bool = True) -> Dict[str, Any]:
+    def ai_search(self, query: str, limit: int = 10, enhance: bool = True, group_by_cluster: bool = False) -> Dict[str, Any]:
         """
-        AI-powered job search using LLM + Typesense
+        AI-powered job search using LLM + Typesense.
+
+        With group_by_cluster, near-duplicate postings are grouped by
+        cluster_id and only the best posting of each cluster is returned
+        (and enhanced), with the others listed under 'cluster'.
         """
         try:
             # Step 1: LLM parses the query
@@ -20,16 +37,21 @@ class JobSearchService:
             
             # Step 2: Build Typesense search parameters
             search_params = self._build_search_params(llm_parsed, limit)
+            if group_by_cluster:
+                search_params['group_by'] = 'cluster_id'
+                search_params['group_limit'] = CLUSTER_GROUP_LIMIT
             
-            # Step 3: Search with Typesense
-            results = self.typesense_client.search_documents(search_params)
+            # Step 3: Search with Typesense (local index if it is unreachable)
+            results = self.search_documents(search_params)
             
             # Step 4: Process results
             jobs = []
-            for hit in results['hits']:
+            for hit, cluster in self._iter_hits(results):
                 try:
                     job = Job(**hit['document'])
                     job_dict = job.dict()
+                    if cluster:
+                        job_dict['cluster'] = cluster
                     
                     # Step 5: Enhance job with LLM if requested
                     if enhance:
@@ -53,20 +75,63 @@ class JobSearchService:
             
             # Step 7: Add LLM analysis if requested
             if enhance and jobs:
-                response['ai_analysis'] = self.llm_analyzer.analyze_jobs(jobs, query)
+                response['ai_analysis'] = self.llm_analyzer.analyze_jobs(
+                    jobs, query, results.get('facet_counts')
+                )
             
             return response
             
         except Exception as e:
             raise Exception(f"AI search failed: {str(e)}")
     
+    def search_documents(self, search_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a search through the result cache, Typesense and, when it is
+        unreachable, the local fallback index. Results served by the local
+        index are never cached.
+        """
+        cache_key = make_key(search_params)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        results, served_locally = self.fallback_search.search_documents(self.typesense_client, search_params)
+        if not served_locally:
+            self.result_cache.set(cache_key, results)
+        return results
+    
+    def chat_context_search(self, message: str, per_page: int = 3) -> Dict[str, Any]:
+        """Retrieve jobs to ground a chat reply"""
+        return self.search_documents({
+            "q": message,
+            "query_by": "title,company,description",
+            "per_page": per_page
+        })
+    
+    def _iter_hits(self, results: Dict[str, Any]):
+        """Yield (hit, cluster info) pairs from plain or grouped results"""
+        if 'grouped_hits' not in results:
+            for hit in results['hits']:
+                yield hit, None
+            return
+        for group in results['grouped_hits']:
+            if not group['hits']:
+                continue
+            yield group['hits'][0], {
+                'cluster_id': group['group_key'][0],
+                'postings_in_results': group.get('found', len(group['hits'])),
+                'similar_job_ids': [h['document'].get('job_id') for h in group['hits'][1:]]
+            }
+    
     def _build_search_params(self, llm_parsed: Dict, limit: int) -> Dict[str, Any]:
         """Build Typesense search parameters from LLM parsing"""
         search_params = {
             'q': llm_parsed.get('search_query', '*'),
             'query_by': 'title,company,description',
             'per_page': limit,
-            'sort_by': self._get_sort_by(llm_parsed.get('sort_by', 'relevance'))
+            'sort_by': self._get_sort_by(llm_parsed.get('sort_by', 'relevance')),
+            'facet_by': 'company,location',
+            'max_facet_values': 5
         }
         
         # Add filters if available
@@ -125,7 +190,7 @@ class JobSearchService:
             search_params['filter_by'] = ' && '.join(filters)
         
         try:
-            results = self.typesense_client.search_documents(search_params)
+            results = self.search_documents(search_params)
             return [Job(**hit['document']) for hit in results['hits']]
         except Exception as e:
             raise Exception(f"Search failed: {str(e)}")
@@ -133,7 +198,7 @@ class JobSearchService:
     def get_job_by_id(self, job_id: int) -> Job:
         """Get a specific job by ID"""
         try:
-            doc = self.typesense_client.get_document(job_id)
+            doc = self.fallback_search.get_document(self.typesense_client, job_id)
             return Job(**doc)
         except Exception as e:
             raise Exception(f'Job with ID {job_id} not found')
@@ -145,7 +210,17 @@ class JobSearchService:
             return {
                 'collection_name': 'jobs',
                 'total_documents': collection.get('num_documents', 0),
-                'fields': [field['name'] for field in collection.get('fields', [])]
+                'fields': [field['name'] for field in collection.get('fields', [])],
+                'market': self.market_aggregates.summary()
             }
         except Exception as e:
-            raise Exception(f"Failed to get stats: {str(e)}") 
\ No newline at end of file
+            local_index = self.fallback_search.index()
+            if local_index is None:
+                raise Exception(f"Failed to get stats: {str(e)}")
+            return {
+                'collection_name': 'jobs',
+                'total_documents': len(local_index),
+                'fields': [field['name'] for field in JOB_COLLECTION_SCHEMA['fields']],
+                'market': self.market_aggregates.summary(),
+                'degraded': True
+            } 
\ No newline at end of file
@@ -0,0 +1,293 @@
+import os
+import csv
+import sys
+import json
+import math
+import glob
+import mmap
+import shutil
+import contextlib
+from array import array
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single-process use only
+    fcntl = None
+
+DATA_FILE = os.getenv('DATA_FILE', 'data/job.csv')
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'data/job_snapshot')
+
+SNAPSHOT_VERSION = 1
+
+# Schema field -> accepted CSV headers (raw feed headers first, then schema names)
+CSV_COLUMN_MAP = {
+    'title': ('Job Title', 'title'),
+    'company': ('Company Name', 'company'),
+    'rating': ('Company Ratings', 'rating'),
+    'location': ('Location', 'location'),
+    'source': ('Salary Est', 'source'),
+    'description': ('Description', 'description'),
+    'application_method': ('Apply Type', 'application_method')
+}
+
+STRING_COLUMNS = ('title', 'company', 'location', 'source', 'description', 'application_method')
+
+
+def clean_text(text: Optional[str]) -> str:
+    """Simple text cleaning"""
+    if not text:
+        return ""
+    return text.strip()
+
+
+def parse_rating(rating: Optional[str]) -> float:
+    """Convert a raw rating to float, NaN when missing"""
+    try:
+        return float(rating) if rating and rating != 'NoData' else math.nan
+    except ValueError:
+        return math.nan
+
+
+class StringColumn:
+    """Offsets-encoded UTF-8 string column backed by a memory map"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    def slice(self, start: int, stop: int) -> List[str]:
+        """Decode rows [start, stop) with a single copy out of the blob"""
+        base = self.offsets[start]
+        chunk = bytes(self.blob[base:self.offsets[stop]])
+        offsets = self.offsets[start:stop + 1]
+        return [chunk[offsets[i] - base:offsets[i + 1] - base].decode('utf-8') for i in range(stop - start)]
+
+
+class JobSnapshot:
+    """
+    Read-only columnar snapshot of the job feed.
+
+    Numeric columns are memory-mapped typed arrays and string columns are
+    offsets + blob pairs, so readers never re-parse the CSV.
+    """
+
+    def __init__(self, snapshot_dir: str = SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        with open(os.path.join(snapshot_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('byteorder') != sys.byteorder:
+            raise ValueError(f"Snapshot {snapshot_dir} was written on a {self.meta.get('byteorder')}-endian host")
+
+        self._maps = []
+        self.rows = self.meta['rows']
+        self.ingest_date = self.meta['ingest_date']
+        self.job_id = self._map('job_id.i32', 'i')
+        self.rating = self._map('rating.f64', 'd')
+        self.strings = {
+            name: StringColumn(self._map(f'{name}.offsets', 'q'), self._map(f'{name}.blob', 'B'))
+            for name in STRING_COLUMNS
+        }
+
+    def _map(self, filename: str, typecode: str) -> memoryview:
+        with open(os.path.join(self.snapshot_dir, filename), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(array(typecode))
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        return memoryview(mm).cast(typecode)
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name: str):
+        """Get a column by schema field name"""
+        if name == 'job_id':
+            return self.job_id
+        if name == 'rating':
+            return self.rating
+        return self.strings[name]
+
+    def iter_batches(self, batch_size: int = 100, start: int = 0, stop: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield lists of job records, decoding each column once per batch"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(batch_start + batch_size, stop)
+            columns = {name: column.slice(batch_start, batch_stop) for name, column in self.strings.items()}
+            job_ids = self.job_id[batch_start:batch_stop].tolist()
+            ratings = self.rating[batch_start:batch_stop].tolist()
+            yield [
+                {
+                    'job_id': job_ids[i],
+                    'title': columns['title'][i],
+                    'company': columns['company'][i],
+                    'rating': None if math.isnan(ratings[i]) else ratings[i],
+                    'location': columns['location'][i],
+                    'source': columns['source'][i],
+                    'description': columns['description'][i],
+                    'application_method': columns['application_method'][i],
+                    'posted_date': self.ingest_date
+                }
+                for i in range(batch_stop - batch_start)
+            ]
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Get a single job record by row index"""
+        return next(self.iter_batches(1, index, index + 1))[0]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield job records one at a time"""
+        for batch in self.iter_batches(1000):
+            yield from batch
+
+    def close(self):
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:
+                # A caller still holds a view into the map; let GC close it
+                pass
+        self._maps = []
+
+
+def _source_info(csv_path: str) -> Dict[str, Any]:
+    stat = os.stat(csv_path)
+    return {'path': os.path.abspath(csv_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+@contextlib.contextmanager
+def _snapshot_lock(snapshot_dir: str):
+    """Exclusive lock held while a snapshot is (re)built, shared by all worker processes"""
+    base = snapshot_dir.rstrip('/\\')
+    parent = os.path.dirname(base)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(base + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def build_snapshot(csv_path: str = DATA_FILE, snapshot_dir: str = SNAPSHOT_DIR) -> Dict[str, Any]:
+    """Parse the CSV once and write a columnar snapshot, returning its metadata"""
+    with _snapshot_lock(snapshot_dir):
+        return _build_snapshot(csv_path, snapshot_dir)
+
+
+def _build_snapshot(csv_path: str, snapshot_dir: str) -> Dict[str, Any]:
+    """Build the snapshot; the caller holds _snapshot_lock"""
+    base = snapshot_dir.rstrip('/\\')
+    # Leftovers of builders that died mid-build
+    for stale in glob.glob(base + '.tmp*'):
+        shutil.rmtree(stale, ignore_errors=True)
+    tmp_dir = f"{base}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir)
+
+    job_ids = array('i')
+    ratings = array('d')
+    offsets = {name: array('q', [0]) for name in STRING_COLUMNS}
+    blobs = {name: open(os.path.join(tmp_dir, f'{name}.blob'), 'wb') for name in STRING_COLUMNS}
+
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            positions = {}
+            for field, candidates in CSV_COLUMN_MAP.items():
+                positions[field] = next((header.index(c) for c in candidates if c in header), None)
+
+            line_number = 0
+            for row in reader:
+                line_number += 1
+                job_ids.append(line_number)
+                rating_pos = positions['rating']
+                ratings.append(parse_rating(row[rating_pos] if rating_pos is not None and rating_pos < len(row) else None))
+                for name in STRING_COLUMNS:
+                    pos = positions[name]
+                    value = clean_text(row[pos] if pos is not None and pos < len(row) else None)
+                    data = value.encode('utf-8')
+                    blobs[name].write(data)
+                    offsets[name].append(offsets[name][-1] + len(data))
+    finally:
+        for blob in blobs.values():
+            blob.close()
+
+    with open(os.path.join(tmp_dir, 'job_id.i32'), 'wb') as f:
+        job_ids.tofile(f)
+    with open(os.path.join(tmp_dir, 'rating.f64'), 'wb') as f:
+        ratings.tofile(f)
+    for name in STRING_COLUMNS:
+        with open(os.path.join(tmp_dir, f'{name}.offsets'), 'wb') as f:
+            offsets[name].tofile(f)
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'rows': len(job_ids),
+        'byteorder': sys.byteorder,
+        'ingest_date': datetime.now().strftime('%Y-%m-%d'),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'source': _source_info(csv_path)
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.replace(tmp_dir, snapshot_dir)
+    print(f"📦 Wrote job snapshot {snapshot_dir} ({meta['rows']} rows)")
+    return meta
+
+
+def is_snapshot_current(csv_path: str = DATA_FILE, snapshot_dir: str = SNAPSHOT_DIR) -> bool:
+    """Check whether the snapshot exists and was built from the current CSV"""
+    meta_path = os.path.join(snapshot_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return False
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if meta.get('version') != SNAPSHOT_VERSION:
+        return False
+    if not os.path.exists(csv_path):
+        # Snapshot outlived its source; it is the only copy we have
+        return True
+    source = _source_info(csv_path)
+    return meta.get('source', {}).get('size') == source['size'] and meta.get('source', {}).get('mtime') == source['mtime']
+
+
+def load_snapshot(csv_path: str = DATA_FILE, snapshot_dir: str = SNAPSHOT_DIR) -> Optional[JobSnapshot]:
+    """
+    Open the snapshot, (re)building it first if the CSV changed. None if no data.
+
+    Concurrent callers (e.g. several gunicorn workers) wait on the build
+    lock and reuse the snapshot built by whichever got it first.
+    """
+    if not is_snapshot_current(csv_path, snapshot_dir):
+        if not os.path.exists(csv_path):
+            return None
+        with _snapshot_lock(snapshot_dir):
+            if not is_snapshot_current(csv_path, snapshot_dir):
+                _build_snapshot(csv_path, snapshot_dir)
+    return JobSnapshot(snapshot_dir)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ingest the job CSV into a columnar snapshot')
+    parser.add_argument('--csv', default=DATA_FILE, help='Source CSV file')
+    parser.add_argument('--out', default=SNAPSHOT_DIR, help='Snapshot directory')
+    args = parser.parse_args()
+    build_snapshot(args.csv, args.out)
@@ -0,0 +1,308 @@
+import os
+import csv
+import sys
+import json
+import glob
+import gzip
+import math
+import time
+import argparse
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from services.dedup import DEDUP_ENABLED, DuplicateClusters, load_clusters
+from services.job_snapshot import (DATA_FILE, SNAPSHOT_DIR, CSV_COLUMN_MAP, STRING_COLUMNS, JobSnapshot,
+                                   clean_text, is_snapshot_current, parse_rating)
+
+TRANSFORMED_DIR = os.getenv('TRANSFORMED_DIR', 'data/transformed')
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_SHARD_SIZE = 500000
+MANIFEST_FILE = 'manifest.json'
+
+
+def read_chunks(csv_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, Dict[str, List[str]]]]:
+    """
+    Read the CSV in chunks of raw columns.
+
+    Yields (first_job_id, columns) where columns maps each schema field to
+    the list of raw cell values for the chunk.
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, [])
+        positions = {
+            field: next((header.index(c) for c in candidates if c in header), None)
+            for field, candidates in CSV_COLUMN_MAP.items()
+        }
+
+        first_job_id = 1
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield first_job_id, _to_columns(rows, positions)
+                first_job_id += len(rows)
+                rows = []
+        if rows:
+            yield first_job_id, _to_columns(rows, positions)
+
+
+def _to_columns(rows: List[List[str]], positions: Dict[str, Optional[int]]) -> Dict[str, List[str]]:
+    columns = {}
+    for field, pos in positions.items():
+        if pos is None:
+            columns[field] = [''] * len(rows)
+        else:
+            columns[field] = [row[pos] if pos < len(row) else '' for row in rows]
+    return columns
+
+
+def chunk_clusters(clusters: DuplicateClusters, start: int, stop: int) -> Tuple[List[int], List[int], bool]:
+    """The slice of the cluster assignment that transform_chunk needs for rows [start, stop)"""
+    canonical = clusters.canonical[start:stop].tolist()
+    return canonical, [clusters.sizes[row] for row in canonical], clusters.mode == 'collapse'
+
+
+def transform_chunk(first_job_id: int, columns: Dict[str, List[str]], posted_date: str, compress: bool = False,
+                    clusters: Optional[Tuple[List[int], List[int], bool]] = None) -> Tuple[int, bytes]:
+    """
+    Clean one chunk column by column and serialize it to NDJSON.
+
+    Runs inside the worker processes. Returns (row_count, payload) where the
+    payload is UTF-8 NDJSON, or a self-contained gzip member when compress
+    is set (gzip members can be concatenated into one valid file).
+
+    With clusters (see chunk_clusters), records get the same cluster_id and
+    duplicate_count as DuplicateClusters.annotate, and duplicates are left
+    out in collapse mode; row_count counts the records written.
+    """
+    cleaned = {name: list(map(clean_text, columns[name])) for name in STRING_COLUMNS}
+    ratings = [None if math.isnan(r) else r for r in map(parse_rating, columns['rating'])]
+
+    encoder = json.JSONEncoder()
+    lines = []
+    for i in range(len(ratings)):
+        record = {
+            'job_id': first_job_id + i,
+            'title': cleaned['title'][i],
+            'company': cleaned['company'][i],
+            'rating': ratings[i],
+            'location': cleaned['location'][i],
+            'source': cleaned['source'][i],
+            'description': cleaned['description'][i],
+            'application_method': cleaned['application_method'][i],
+            'posted_date': posted_date
+        }
+        if clusters is not None:
+            canonical_rows, sizes, collapse = clusters
+            row = first_job_id - 1 + i
+            if collapse and canonical_rows[i] != row:
+                continue
+            record['cluster_id'] = f"c{canonical_rows[i] + 1}"
+            record['duplicate_count'] = sizes[i] - 1
+        lines.append(encoder.encode(record))
+    payload = ('\n'.join(lines) + '\n').encode('utf-8') if lines else b''
+    if compress:
+        payload = gzip.compress(payload, compresslevel=6)
+    return len(lines), payload
+
+
+def _transform_chunk_args(args):
+    return transform_chunk(*args)
+
+
+class ShardWriter:
+    """Writes NDJSON payloads into numbered shard files, rotating by row count"""
+
+    def __init__(self, output_dir: str, shard_size: int = DEFAULT_SHARD_SIZE, compress: bool = False):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.compress = compress
+        self.shards = []
+        self._file = None
+        self._rows_in_shard = 0
+        os.makedirs(output_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(output_dir, 'jobs-*.ndjson*')):
+            os.remove(old)
+
+    def write(self, count: int, payload: bytes):
+        if self._file is None or self._rows_in_shard >= self.shard_size:
+            self._rotate()
+        self._file.write(payload)
+        self._rows_in_shard += count
+        self.shards[-1]['rows'] += count
+
+    def _rotate(self):
+        self._close_current()
+        suffix = '.ndjson.gz' if self.compress else '.ndjson'
+        name = f"jobs-{len(self.shards):05d}{suffix}"
+        self._file = open(os.path.join(self.output_dir, name), 'wb')
+        self._rows_in_shard = 0
+        self.shards.append({'file': name, 'rows': 0})
+
+    def _close_current(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, manifest: Dict[str, Any]):
+        self._close_current()
+        manifest = dict(manifest, shards=self.shards, rows=sum(s['rows'] for s in self.shards))
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def current_snapshot(csv_path: str, snapshot_dir: str = SNAPSHOT_DIR) -> Optional[JobSnapshot]:
+    """The snapshot of csv_path if one is already built and up to date; never builds one"""
+    if not is_snapshot_current(csv_path, snapshot_dir):
+        return None
+    snapshot = JobSnapshot(snapshot_dir)
+    if snapshot.meta.get('source', {}).get('path') != os.path.abspath(csv_path):
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def transform(csv_path: str = DATA_FILE,
+              output_dir: str = TRANSFORMED_DIR,
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              shard_size: int = DEFAULT_SHARD_SIZE,
+              workers: Optional[int] = None,
+              compress: bool = False,
+              posted_date: Optional[str] = None,
+              snapshot_dir: str = SNAPSHOT_DIR) -> Dict[str, Any]:
+    """
+    Transform the CSV feed into sharded NDJSON.
+
+    The main process reads raw chunks; cleaning and serialization run in a
+    process pool. At most two chunks per worker are in flight so memory
+    stays bounded, and results are written in input order.
+
+    Nothing is parsed up front: if a current snapshot of the CSV already
+    exists, its ingest date is the default posted_date (so re-transforming
+    the same feed gives the same documents) and its cached near-duplicate
+    clusters, if any, are applied. Otherwise posted_date defaults to today
+    and the shards are not deduplicated.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.time()
+    total = 0
+
+    snapshot = current_snapshot(csv_path, snapshot_dir)
+    posted_date = posted_date or (snapshot.ingest_date if snapshot is not None else datetime.now().strftime('%Y-%m-%d'))
+    clusters = load_clusters(snapshot, compute=False) if DEDUP_ENABLED and snapshot is not None else None
+    if DEDUP_ENABLED and clusters is None:
+        print("⚠️ No cached duplicate clusters for this feed; shards are not deduplicated")
+
+    writer = ShardWriter(output_dir, shard_size, compress)
+    chunks = (
+        (first_job_id, columns, posted_date, compress,
+         chunk_clusters(clusters, first_job_id - 1, first_job_id - 1 + len(columns['rating'])) if clusters else None)
+        for first_job_id, columns in read_chunks(csv_path, chunk_size)
+    )
+
+    if workers == 1:
+        for args in chunks:
+            count, payload = transform_chunk(*args)
+            writer.write(count, payload)
+            total += count
+            print(f"Processed {total} jobs ✅")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for args in chunks:
+                in_flight.append(pool.submit(_transform_chunk_args, args))
+                if len(in_flight) >= workers * 2:
+                    count, payload = in_flight.popleft().result()
+                    writer.write(count, payload)
+                    total += count
+                    print(f"Processed {total} jobs ✅")
+            while in_flight:
+                count, payload = in_flight.popleft().result()
+                writer.write(count, payload)
+                total += count
+                print(f"Processed {total} jobs ✅")
+
+    elapsed = max(time.time() - started, 1e-6)
+    return writer.close({
+        'source': os.path.abspath(csv_path),
+        'posted_date': posted_date,
+        'compressed': compress,
+        'dedup': {'mode': clusters.mode, 'threshold': clusters.threshold} if clusters else None,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'elapsed_seconds': round(elapsed, 2),
+        'rows_per_sec': round(total / elapsed, 1)
+    })
+
+
+def list_shards(output_dir: str = TRANSFORMED_DIR) -> List[str]:
+    """Shard paths in order, from the manifest when present"""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return [os.path.join(output_dir, shard['file']) for shard in manifest['shards']]
+    return sorted(glob.glob(os.path.join(output_dir, 'jobs-*.ndjson*')))
+
+
+def count_rows(output_dir: str = TRANSFORMED_DIR) -> Optional[int]:
+    """Total rows recorded in the manifest, None if unknown"""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('rows')
+
+
+def iter_ndjson_lines(output_dir: str = TRANSFORMED_DIR) -> Iterator[str]:
+    """Stream NDJSON lines from every shard, transparently un-gzipping"""
+    for path in list_shards(output_dir):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if line:
+                    yield line
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Transform the job CSV feed into sharded NDJSON for import')
+    parser.add_argument('--input', default=DATA_FILE, help='Source CSV file')
+    parser.add_argument('--output-dir', default=TRANSFORMED_DIR, help='Directory for NDJSON shards')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per worker chunk')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='Rows per output shard')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--gzip', action='store_true', help='Gzip-compress the shards')
+    parser.add_argument('--posted-date', default=None, help='posted_date to stamp on every job (default: the snapshot ingest date, else today)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"❌ Job data file not found: {args.input}")
+        sys.exit(1)
+
+    print('Processing job records:')
+    manifest = transform(args.input, args.output_dir, args.chunk_size, args.shard_size,
+                         args.workers, args.gzip, args.posted_date)
+
+    print(f"Transformation complete! Output saved to {args.output_dir}")
+    print(f"Total jobs processed: {manifest['rows']}")
+
+    # Print some statistics
+    print("\nJob Statistics:")
+    print(f"Input file: {args.input}")
+    print(f"Output shards: {len(manifest['shards'])}")
+    print(f"Rows/sec: {manifest['rows_per_sec']}")
+
+    # Show sample of processed data
+    first_line = next(iter_ndjson_lines(args.output_dir), None)
+    if first_line:
+        sample_job = json.loads(first_line)
+        print("\n📋 Sample Job Record:")
+        print(f"Title: {sample_job['title']}")
+        print(f"Company: {sample_job['company']}")
+        print(f"Location: {sample_job['location']}")
+        print(f"Rating: {sample_job['rating']}")
+        print(f"Source: {sample_job['source']}")
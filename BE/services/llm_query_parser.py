@@ -3,19 +3,30 @@ import json
 import openai
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
+from services.rate_limit import acquire_llm_slot
+from services.cache import get_cache
 
 load_dotenv()
 
+# Parsed queries are stable for a given text; keep them for an hour by default
+PARSE_CACHE_TTL = float(os.getenv('PARSE_CACHE_TTL', '3600'))
+
 class LLMQueryParser:
     def __init__(self):
         self.client = openai.OpenAI(
             api_key=os.getenv('OPENAI_API_KEY')
         )
+        self.cache = get_cache('llm_parse', maxsize=4096, ttl=PARSE_CACHE_TTL)
     
     def parse_query(self, user_query: str) -> Dict[str, Any]:
         """
         Parse natural language job search query into structured search parameters
         """
+        cache_key = ' '.join(user_query.lower().split())
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
         prompt = f"""
         You are a job search assistant. Parse this job search query and extract structured information for a search engine.
 
@@ -35,6 +46,7 @@ class LLMQueryParser:
         """
 
         try:
+            acquire_llm_slot()
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
@@ -45,7 +57,8 @@ class LLMQueryParser:
             )
             
             result = json.loads(response.choices[0].message.content)
-            return result
+            self.cache.set(cache_key, result)
+            return dict(result)
             
         except Exception as e:
             # Fallback to simple keyword extraction
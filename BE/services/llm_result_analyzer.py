@@ -1,8 +1,10 @@
 import os
 import json
 import openai
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
+from services.rate_limit import acquire_llm_slot
+from services.market_aggregates import get_market_aggregate_service, summarize_results
 
 load_dotenv()
 
@@ -12,9 +14,13 @@ class LLMResultAnalyzer:
             api_key=os.getenv('OPENAI_API_KEY')
         )
     
-    def analyze_results(self, jobs: List[Dict], original_query: str) -> Dict[str, Any]:
+    def analyze_results(self, jobs: List[Dict], original_query: str, facet_counts: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
-        Analyze job search results and provide insights using LLM
+        Analyze job search results and provide insights using LLM.
+
+        Salary, skill, company and location numbers are computed from the
+        results and the precomputed market aggregates; the LLM only
+        narrates them.
         """
         if not jobs:
             return {
@@ -23,17 +29,33 @@ class LLMResultAnalyzer:
                 "recommendations": []
             }
         
-        # Prepare job data for analysis
-        job_summaries = []
-        for job in jobs[:10]:  # Analyze first 10 jobs
-            summary = f"Title: {job.get('title', 'N/A')}, Company: {job.get('company', 'N/A')}, Location: {job.get('location', 'N/A')}"
-            job_summaries.append(summary)
+        numbers = summarize_results(jobs, facet_counts)
+        market = get_market_aggregate_service().summary()
+        salary_trends = dict(numbers['salary'])
+        if market:
+            salary_trends['market_median_midpoint'] = market['salary']['median_midpoint']
+            salary_trends['market_avg_rating'] = market['ratings']['average']
+        
+        analysis = {
+            "salary_trends": salary_trends,
+            "skill_demand": numbers['top_skills'],
+            "ratings": numbers['ratings'],
+            "top_companies": numbers['top_companies'],
+            "top_locations": numbers['top_locations']
+        }
+        
+        figures = {"jobs_found": len(jobs), **analysis}
+        if market:
+            figures["market"] = {
+                "salary_median_midpoint": market['salary']['median_midpoint'],
+                "top_skills": market['top_skills'][:5]
+            }
         
         prompt = f"""
-        Analyze these job search results for the query: "{original_query}"
+        Write a short analysis of these job search results for the query: "{original_query}"
 
-        Jobs found:
-        {chr(10).join(job_summaries)}
+        Use only these precomputed figures; do not invent numbers:
+        {json.dumps(figures)}
 
         Provide analysis in JSON format:
         {{
@@ -45,46 +67,51 @@ class LLMResultAnalyzer:
             "recommendations": [
                 "Recommendation for the job seeker",
                 "Another recommendation"
-            ],
-            "salary_trends": "Any salary insights if available",
-            "skill_demand": "Most in-demand skills from these jobs"
+            ]
         }}
         """
 
         try:
+            acquire_llm_slot()
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
-                    {"role": "system", "content": "You are a job market analyst. Provide helpful insights about job search results."},
+                    {"role": "system", "content": "You are a job market analyst. Narrate the numbers you are given; never make up figures."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3
             )
             
             result = json.loads(response.choices[0].message.content)
-            return result
+            return {
+                "summary": result.get("summary", f"Found {len(jobs)} jobs matching your search."),
+                "insights": result.get("insights", []),
+                "recommendations": result.get("recommendations", []),
+                **analysis
+            }
             
         except Exception as e:
             # Fallback analysis
+            insights = [f"Search returned {len(jobs)} results"]
+            if salary_trends.get('median_midpoint'):
+                insights.append(f"Median estimated salary in these results is ${salary_trends['median_midpoint']:,.0f}")
+            if numbers['top_skills']:
+                insights.append("Most requested skills: " + ", ".join(s['skill'] for s in numbers['top_skills'][:3]))
             return {
                 "summary": f"Found {len(jobs)} jobs matching your search.",
-                "insights": [
-                    f"Search returned {len(jobs)} results",
-                    "Consider refining your search terms for better matches"
-                ],
+                "insights": insights,
                 "recommendations": [
                     "Review job descriptions carefully",
                     "Apply to positions that match your skills"
                 ],
-                "salary_trends": "Salary information not available in this dataset",
-                "skill_demand": "Check job descriptions for required skills"
+                **analysis
             }
     
-    def analyze_jobs(self, jobs: List[Dict], original_query: str) -> Dict[str, Any]:
+    def analyze_jobs(self, jobs: List[Dict], original_query: str, facet_counts: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Alias for analyze_results to match the service call
         """
-        return self.analyze_results(jobs, original_query)
+        return self.analyze_results(jobs, original_query, facet_counts)
     
     def enhance_job(self, job: Dict, query: str) -> Dict[str, Any]:
         """
@@ -106,6 +133,7 @@ class LLMResultAnalyzer:
         """
 
         try:
+            acquire_llm_slot()
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
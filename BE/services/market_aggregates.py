@@ -0,0 +1,283 @@
+import re
+import math
+import time
+import threading
+from array import array
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from services.dedup import iter_job_batches
+from services.job_snapshot import DATA_FILE, SNAPSHOT_DIR, load_snapshot
+from services.shared_store import catalog_generation
+
+# Annual salary histogram: $10K buckets from $0 to $300K, last bucket is open-ended
+SALARY_BUCKET_SIZE = 10000
+SALARY_BUCKETS = 31
+HOURS_PER_YEAR = 2080
+
+# Rating histogram: 0.5-wide buckets from 0 to 5
+RATING_BUCKET_SIZE = 0.5
+RATING_BUCKETS = 11
+
+SKILL_TERMS = (
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'golang', 'rust', 'ruby', 'php', 'scala', 'kotlin', 'swift',
+    'sql', 'nosql', 'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch',
+    'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'fastapi', 'spring boot', '.net',
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'linux', 'git', 'ci/cd',
+    'machine learning', 'deep learning', 'nlp', 'pytorch', 'tensorflow', 'pandas', 'spark', 'hadoop', 'airflow',
+    'tableau', 'power bi', 'statistics', 'data analysis', 'etl',
+    'agile', 'scrum', 'rest api', 'graphql', 'microservices', 'communication', 'leadership'
+)
+SKILL_RE = re.compile(
+    r'(?<![\w+#.])(' + '|'.join(re.escape(term) for term in sorted(SKILL_TERMS, key=len, reverse=True)) + r')(?![\w+#])'
+)
+SKILL_INDEX = {term: i for i, term in enumerate(SKILL_TERMS)}
+
+SALARY_RE = re.compile(r'\$\s*([\d,]+(?:\.\d+)?)\s*(k)?', re.IGNORECASE)
+
+
+def parse_salary(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    Parse a Glassdoor-style `Salary Est` into an annual (low, high) range.
+
+    Handles "$56K - $102K (Glassdoor est.)", "$120K (Employer est.)" and
+    hourly figures such as "$25.00 - $30.00 Per Hour".
+    """
+    if not text:
+        return None
+    amounts = []
+    for number, thousands in SALARY_RE.findall(text):
+        value = float(number.replace(',', ''))
+        if thousands:
+            value *= 1000
+        amounts.append(value)
+    if not amounts:
+        return None
+    if 'hour' in text.lower():
+        amounts = [a * HOURS_PER_YEAR for a in amounts]
+    return min(amounts), max(amounts)
+
+
+def extract_skills(text: Optional[str]) -> List[str]:
+    """Distinct skill terms mentioned in a description"""
+    if not text:
+        return []
+    return sorted(set(SKILL_RE.findall(text.lower())))
+
+
+def _median(values: List[float]) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def _histogram_quantile(histogram: array, bucket_size: float, quantile: float) -> Optional[float]:
+    """Approximate a quantile from bucket counts (bucket midpoint)"""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = quantile * total
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return (bucket + 0.5) * bucket_size
+    return (len(histogram) - 0.5) * bucket_size
+
+
+class MarketAggregates:
+    """
+    Array-backed market statistics over a set of jobs.
+
+    Call add_documents() with each imported batch; every counter is
+    additive so the aggregates can be refreshed incrementally.
+    """
+
+    def __init__(self):
+        self.total_jobs = 0
+        self.salary_histogram = array('I', [0] * SALARY_BUCKETS)
+        self.salary_low_sum = 0.0
+        self.salary_high_sum = 0.0
+        self.jobs_with_salary = 0
+        self.rating_histogram = array('I', [0] * RATING_BUCKETS)
+        self.rating_sum = 0.0
+        self.jobs_with_rating = 0
+        self.skill_counts = array('I', [0] * len(SKILL_TERMS))
+        self.companies: Dict[str, int] = {}
+        self.locations: Dict[str, int] = {}
+        self.updated_at = None
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]]):
+        for doc in documents:
+            self.total_jobs += 1
+
+            salary = parse_salary(doc.get('source'))
+            if salary:
+                low, high = salary
+                self.jobs_with_salary += 1
+                self.salary_low_sum += low
+                self.salary_high_sum += high
+                bucket = min(int((low + high) / 2 // SALARY_BUCKET_SIZE), SALARY_BUCKETS - 1)
+                self.salary_histogram[bucket] += 1
+
+            rating = doc.get('rating')
+            if rating is not None and not math.isnan(rating):
+                self.jobs_with_rating += 1
+                self.rating_sum += rating
+                bucket = min(max(int(rating / RATING_BUCKET_SIZE), 0), RATING_BUCKETS - 1)
+                self.rating_histogram[bucket] += 1
+
+            for skill in extract_skills(doc.get('description')):
+                self.skill_counts[SKILL_INDEX[skill]] += 1
+
+            company = doc.get('company')
+            if company:
+                self.companies[company] = self.companies.get(company, 0) + 1
+            location = doc.get('location')
+            if location:
+                self.locations[location] = self.locations.get(location, 0) + 1
+        self.updated_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def salary_summary(self) -> Dict[str, Any]:
+        return {
+            'jobs_with_salary': self.jobs_with_salary,
+            'avg_low': round(self.salary_low_sum / self.jobs_with_salary) if self.jobs_with_salary else None,
+            'avg_high': round(self.salary_high_sum / self.jobs_with_salary) if self.jobs_with_salary else None,
+            'median_midpoint': _histogram_quantile(self.salary_histogram, SALARY_BUCKET_SIZE, 0.5),
+            'p90_midpoint': _histogram_quantile(self.salary_histogram, SALARY_BUCKET_SIZE, 0.9),
+            'histogram': [
+                {'from': bucket * SALARY_BUCKET_SIZE,
+                 'to': (bucket + 1) * SALARY_BUCKET_SIZE if bucket < SALARY_BUCKETS - 1 else None,
+                 'count': count}
+                for bucket, count in enumerate(self.salary_histogram) if count
+            ]
+        }
+
+    def rating_summary(self) -> Dict[str, Any]:
+        return {
+            'jobs_with_rating': self.jobs_with_rating,
+            'average': round(self.rating_sum / self.jobs_with_rating, 2) if self.jobs_with_rating else None,
+            'histogram': [
+                {'from': bucket * RATING_BUCKET_SIZE, 'count': count}
+                for bucket, count in enumerate(self.rating_histogram) if count
+            ]
+        }
+
+    def top_skills(self, limit: int = 10) -> List[Dict[str, Any]]:
+        ranked = sorted(range(len(SKILL_TERMS)), key=lambda i: self.skill_counts[i], reverse=True)
+        return [
+            {'skill': SKILL_TERMS[i], 'jobs': self.skill_counts[i],
+             'share': round(self.skill_counts[i] / self.total_jobs, 3) if self.total_jobs else 0.0}
+            for i in ranked[:limit] if self.skill_counts[i]
+        ]
+
+    def to_dict(self, top_n: int = 10) -> Dict[str, Any]:
+        return {
+            'total_jobs': self.total_jobs,
+            'salary': self.salary_summary(),
+            'ratings': self.rating_summary(),
+            'top_companies': _top(self.companies, top_n),
+            'top_locations': _top(self.locations, top_n),
+            'top_skills': self.top_skills(top_n),
+            'updated_at': self.updated_at
+        }
+
+
+def _top(counts: Dict[str, int], limit: int) -> List[Dict[str, Any]]:
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{'value': value, 'count': count} for value, count in ranked]
+
+
+def summarize_results(jobs: List[Dict[str, Any]], facet_counts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Exact numbers for a search result set.
+
+    Salary figures use the exact median of the result jobs; company and
+    location counts come from the Typesense facets when provided (they
+    cover every match, not just the returned page).
+    """
+    aggregates = MarketAggregates()
+    aggregates.add_documents(jobs)
+
+    midpoints = []
+    for job in jobs:
+        salary = parse_salary(job.get('source'))
+        if salary:
+            midpoints.append((salary[0] + salary[1]) / 2)
+
+    salary = aggregates.salary_summary()
+    salary['median_midpoint'] = _median(midpoints)
+
+    facets = {facet['field_name']: facet['counts'] for facet in (facet_counts or [])}
+    top_companies = [{'value': c['value'], 'count': c['count']} for c in facets.get('company', [])] or _top(aggregates.companies, 5)
+    top_locations = [{'value': c['value'], 'count': c['count']} for c in facets.get('location', [])] or _top(aggregates.locations, 5)
+
+    return {
+        'salary': salary,
+        'ratings': aggregates.rating_summary(),
+        'top_companies': top_companies[:5],
+        'top_locations': top_locations[:5],
+        'top_skills': aggregates.top_skills(8)
+    }
+
+
+class MarketAggregateService:
+    """Holds the market-wide aggregates computed at import time"""
+
+    def __init__(self, csv_path: str = DATA_FILE, snapshot_dir: str = SNAPSHOT_DIR):
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self._aggregates: Optional[MarketAggregates] = None
+        self._summary: Optional[Dict[str, Any]] = None
+        self._generation = catalog_generation()
+        self._lock = threading.Lock()
+
+    def publish(self, aggregates: MarketAggregates):
+        """Swap in aggregates computed during import"""
+        self._aggregates = aggregates
+        self._summary = None
+        self._generation = catalog_generation()
+
+    def _check_generation(self):
+        generation = catalog_generation()
+        if generation != self._generation:
+            # Another worker reindexed; recompute from the new snapshot
+            self._aggregates = None
+            self._summary = None
+            self._generation = generation
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """Market-wide aggregates as a dict, cached until the next publish"""
+        self._check_generation()
+        if self._summary is None:
+            aggregates = self.aggregates()
+            if aggregates is not None:
+                self._summary = aggregates.to_dict()
+        return self._summary
+
+    def aggregates(self) -> Optional[MarketAggregates]:
+        """Get the aggregates, computing them from the snapshot if no import ran in this process"""
+        self._check_generation()
+        if self._aggregates is None:
+            with self._lock:
+                if self._aggregates is None:
+                    snapshot = load_snapshot(self.csv_path, self.snapshot_dir)
+                    if snapshot is not None:
+                        started = time.time()
+                        aggregates = MarketAggregates()
+                        for batch in iter_job_batches(snapshot, 1000, compute=False):
+                            aggregates.add_documents(batch)
+                        self._aggregates = aggregates
+                        print(f"📈 Computed market aggregates in {time.time() - started:.2f}s")
+        return self._aggregates
+
+
+_market_aggregate_service = None
+
+
+def get_market_aggregate_service() -> MarketAggregateService:
+    """Process-wide MarketAggregateService instance"""
+    global _market_aggregate_service
+    if _market_aggregate_service is None:
+        _market_aggregate_service = MarketAggregateService()
+    return _market_aggregate_service
@@ -0,0 +1,174 @@
+import os
+import time
+import socket
+import threading
+from typing import Dict, Any, List, Optional
+from services.shared_store import get_shared_store
+
+# How often each worker publishes its counters to the shared store
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _new_route() -> Dict[str, Any]:
+    return {'requests': 0, 'errors': 0, 'total_ms': 0.0, 'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+
+
+class WorkerMetrics:
+    """
+    Request counters and latency histograms for this worker process.
+
+    Requests are recorded in memory; a background thread publishes the
+    counters to the shared store every METRICS_FLUSH_INTERVAL, busy or
+    idle, and /metrics sums them over all live workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.worker = f"{socket.gethostname()}:{self.pid}"
+        self.started_at = time.time()
+        self.routes: Dict[str, Dict[str, Any]] = {}
+
+    def _check_fork(self):
+        if self.pid != os.getpid():
+            # Forked from the preloading master: start from empty counters
+            self._reset()
+
+    def observe(self, route: str, status: int, duration_ms: float):
+        with self._lock:
+            self._check_fork()
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = _new_route()
+            stats['requests'] += 1
+            if status >= 500:
+                stats['errors'] += 1
+            stats['total_ms'] += duration_ms
+            bucket = len(LATENCY_BUCKETS_MS)
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if duration_ms <= bound:
+                    bucket = i
+                    break
+            stats['buckets'][bucket] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._check_fork()
+            return {
+                'worker': self.worker,
+                'pid': self.pid,
+                'started_at': self.started_at,
+                'routes': {route: dict(stats, buckets=list(stats['buckets'])) for route, stats in self.routes.items()}
+            }
+
+    def start_flusher(self):
+        """Publish this worker's counters now and every METRICS_FLUSH_INTERVAL (call once per worker)"""
+        if get_shared_store() is None:
+            return
+        self.flush()
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        store = get_shared_store()
+        if store is None:
+            return
+        snapshot = self.snapshot()
+        try:
+            store.put_metrics(snapshot['worker'], snapshot)
+        except Exception as e:
+            print(f"⚠️ Failed to publish worker metrics: {e}")
+
+
+def _quantile(buckets: List[int], quantile: float) -> Optional[float]:
+    """Upper bound of the bucket holding the quantile (None past the last bound)"""
+    total = sum(buckets)
+    if not total:
+        return None
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if seen >= quantile * total:
+            return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+    return None
+
+
+def aggregate_metrics(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum per-worker snapshots into per-route totals with latency percentiles"""
+    routes: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for route, stats in snapshot['routes'].items():
+            total = routes.setdefault(route, _new_route())
+            total['requests'] += stats['requests']
+            total['errors'] += stats['errors']
+            total['total_ms'] += stats['total_ms']
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], stats['buckets'])]
+
+    summary = {}
+    for route, stats in sorted(routes.items()):
+        summary[route] = {
+            'requests': stats['requests'],
+            'errors': stats['errors'],
+            'avg_ms': round(stats['total_ms'] / stats['requests'], 1) if stats['requests'] else None,
+            'p50_ms': _quantile(stats['buckets'], 0.5),
+            'p95_ms': _quantile(stats['buckets'], 0.95),
+            'p99_ms': _quantile(stats['buckets'], 0.99)
+        }
+    return {
+        'requests': sum(stats['requests'] for stats in routes.values()),
+        'errors': sum(stats['errors'] for stats in routes.values()),
+        'routes': summary
+    }
+
+
+def _worker_alive(snapshot: Dict[str, Any]) -> bool:
+    """Whether the worker that published a snapshot is still running (the store is per host)"""
+    try:
+        os.kill(snapshot['pid'], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_worker_metrics = None
+
+
+def get_worker_metrics() -> WorkerMetrics:
+    """Process-wide WorkerMetrics instance"""
+    global _worker_metrics
+    if _worker_metrics is None:
+        _worker_metrics = WorkerMetrics()
+    return _worker_metrics
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Metrics for the whole server: every live worker when shared state is enabled, else this process"""
+    metrics = get_worker_metrics()
+    store = get_shared_store()
+    if store is None:
+        snapshots = [metrics.snapshot()]
+    else:
+        metrics.flush()
+        snapshots = []
+        for snapshot in store.all_metrics():
+            if _worker_alive(snapshot):
+                snapshots.append(snapshot)
+            else:
+                store.delete_metrics(snapshot['worker'])
+    return {
+        'workers': [{'worker': s['worker'], 'pid': s['pid'], 'started_at': s['started_at'],
+                     'requests': sum(r['requests'] for r in s['routes'].values())} for s in snapshots],
+        **aggregate_metrics(snapshots)
+    }
@@ -0,0 +1,162 @@
+import os
+import glob
+import json
+import time
+import atexit
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
+
+QUERY_LOG_ENABLED = os.getenv('QUERY_LOG_ENABLED', 'true').lower() == 'true'
+QUERY_LOG_DIR = os.getenv('QUERY_LOG_DIR', 'data/query_logs')
+QUERY_LOG_MAX_BYTES = int(os.getenv('QUERY_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+# Rotated files to keep; 0 drops each file as soon as it is rotated
+QUERY_LOG_BACKUPS = max(0, int(os.getenv('QUERY_LOG_BACKUPS', '10')))
+
+# Writer thread flushes at least this often, or sooner once the buffer fills
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH = 500
+# Entries beyond this are dropped rather than blocking or growing without bound
+MAX_BUFFERED = 50000
+
+CURRENT_FILE = 'queries.ndjson'
+
+
+class QueryLog:
+    """
+    Append-only NDJSON log of user queries.
+
+    log() only appends to an in-memory buffer; a daemon thread writes
+    batches to disk and rotates the file by size, keeping QUERY_LOG_BACKUPS
+    rotated files.
+    """
+
+    def __init__(self, log_dir: str = QUERY_LOG_DIR, enabled: bool = QUERY_LOG_ENABLED):
+        self.log_dir = log_dir
+        self.enabled = enabled
+        self.dropped = 0
+        self._buffer = deque()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+
+    def log(self, endpoint: str, params: Dict[str, Any], status: int = 200,
+            duration_ms: Optional[float] = None, method: str = 'GET'):
+        """Record one request; never blocks on disk I/O"""
+        if not self.enabled:
+            return
+        if len(self._buffer) >= MAX_BUFFERED:
+            self.dropped += 1
+            return
+        self._buffer.append({
+            'ts': round(time.time(), 3),
+            'method': method,
+            'endpoint': endpoint,
+            'params': params,
+            'status': status,
+            'duration_ms': round(duration_ms, 1) if duration_ms is not None else None
+        })
+        self._ensure_writer()
+        if len(self._buffer) >= FLUSH_BATCH:
+            self._wakeup.set()
+
+    def _ensure_writer(self):
+        # Threads do not survive a fork, so a forked worker starts its own writer
+        if self._writer is not None and self._writer_pid == os.getpid():
+            return
+        with self._writer_lock:
+            if self._writer is None or self._writer_pid != os.getpid():
+                os.makedirs(self.log_dir, exist_ok=True)
+                self._writer = threading.Thread(target=self._run, name='query-log-writer', daemon=True)
+                self._writer_pid = os.getpid()
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Query log flush failed: {e}")
+
+    def flush(self):
+        """Write buffered entries to disk"""
+        with self._write_lock:
+            if not self._buffer:
+                return
+            lines = []
+            while self._buffer:
+                lines.append(json.dumps(self._buffer.popleft()) + '\n')
+            path = os.path.join(self.log_dir, CURRENT_FILE)
+            # A single O_APPEND write keeps lines from concurrent worker processes whole
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, ''.join(lines).encode('utf-8'))
+            finally:
+                os.close(fd)
+            if os.path.getsize(path) >= QUERY_LOG_MAX_BYTES:
+                self._rotate(path)
+
+    def _rotate(self, path: str):
+        rotated = os.path.join(self.log_dir, f"queries-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}.ndjson")
+        try:
+            os.replace(path, rotated)
+        except FileNotFoundError:
+            # Another worker rotated it first
+            return
+        rotated_files = sorted(glob.glob(os.path.join(self.log_dir, 'queries-*.ndjson')))
+        # Not rotated_files[:-QUERY_LOG_BACKUPS], which is empty when no backups are kept
+        for old in rotated_files[:len(rotated_files) - QUERY_LOG_BACKUPS]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+
+def list_log_files(log_dir: str = QUERY_LOG_DIR) -> List[str]:
+    """Log files oldest first, with the current file last"""
+    rotated = sorted(glob.glob(os.path.join(log_dir, 'queries-*.ndjson')))
+    current = os.path.join(log_dir, CURRENT_FILE)
+    return rotated + ([current] if os.path.exists(current) else [])
+
+
+def iter_entries(log_dir: str = QUERY_LOG_DIR, since: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Stream logged entries in time order, skipping partial lines"""
+    for path in list_log_files(log_dir):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or entry.get('ts', 0) >= since:
+                    yield entry
+
+
+def top_queries(limit: int = 50, log_dir: str = QUERY_LOG_DIR, since: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Most frequent (endpoint, params) pairs among successful requests"""
+    counts = Counter()
+    samples = {}
+    for entry in iter_entries(log_dir, since):
+        if entry.get('status', 200) >= 400:
+            continue
+        key = (entry['endpoint'], json.dumps(entry['params'], sort_keys=True))
+        counts[key] += 1
+        samples[key] = entry
+    return [dict(samples[key], count=count) for key, count in counts.most_common(limit)]
+
+
+_query_log = None
+
+
+def get_query_log() -> QueryLog:
+    """Process-wide QueryLog instance"""
+    global _query_log
+    if _query_log is None:
+        _query_log = QueryLog()
+    return _query_log
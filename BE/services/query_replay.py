@@ -0,0 +1,128 @@
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from services.query_log import QUERY_LOG_DIR, iter_entries
+
+
+def _percentile(values: List[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(int(round(percentile / 100 * (len(values) - 1))), len(values) - 1)
+    return round(values[index], 1)
+
+
+def _encode_params(params: Dict[str, Any]) -> str:
+    clean = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        clean[key] = str(value).lower() if isinstance(value, bool) else value
+    return urllib.parse.urlencode(clean)
+
+
+def send(base_url: str, entry: Dict[str, Any], timeout: float = 30) -> int:
+    """Re-issue one logged request and return the HTTP status"""
+    url = base_url.rstrip('/') + entry['endpoint']
+    if entry.get('method', 'GET') == 'POST':
+        request = urllib.request.Request(
+            url, data=json.dumps(entry['params']).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+    else:
+        query = _encode_params(entry['params'])
+        request = urllib.request.Request(url + ('?' + query if query else ''), method='GET')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def replay(entries: List[Dict[str, Any]], base_url: str, speed: float = 1.0,
+           concurrency: int = 8, timeout: float = 30) -> Dict[str, Any]:
+    """
+    Replay logged requests, preserving their relative timing.
+
+    Inter-arrival gaps are divided by speed (2.0 replays twice as fast);
+    speed 0 sends everything as fast as the worker pool allows.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    lock = threading.Lock()
+
+    def run(entry):
+        started = time.time()
+        try:
+            status = send(base_url, entry, timeout)
+        except Exception:
+            status = 0
+        latency = (time.time() - started) * 1000
+        with lock:
+            stats = results.setdefault(entry['endpoint'], {'latencies': [], 'errors': 0})
+            stats['latencies'].append(latency)
+            if status == 0 or status >= 400:
+                stats['errors'] += 1
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        first_ts = entries[0]['ts'] if entries else 0
+        for entry in entries:
+            if speed > 0:
+                delay = (entry['ts'] - first_ts) / speed - (time.time() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, entry)
+    elapsed = time.time() - started
+
+    total = sum(len(s['latencies']) for s in results.values())
+    return {
+        'requests': total,
+        'elapsed_seconds': round(elapsed, 2),
+        'requests_per_sec': round(total / elapsed, 1) if elapsed > 0 else None,
+        'endpoints': {
+            endpoint: {
+                'requests': len(stats['latencies']),
+                'errors': stats['errors'],
+                'mean_ms': round(sum(stats['latencies']) / len(stats['latencies']), 1),
+                'p50_ms': _percentile(stats['latencies'], 50),
+                'p95_ms': _percentile(stats['latencies'], 95),
+                'p99_ms': _percentile(stats['latencies'], 99)
+            }
+            for endpoint, stats in results.items()
+        }
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Replay captured queries against a running API for benchmarking')
+    parser.add_argument('--base-url', default='http://localhost:8000', help='API to replay against')
+    parser.add_argument('--log-dir', default=QUERY_LOG_DIR, help='Query log directory')
+    parser.add_argument('--speed', type=float, default=1.0, help='Speed multiplier (0 = no delays)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent requests in flight')
+    parser.add_argument('--endpoint', action='append', help='Only replay this endpoint (repeatable)')
+    parser.add_argument('--since-hours', type=float, default=None, help='Only replay queries from the last N hours')
+    parser.add_argument('--limit', type=int, default=None, help='Replay at most N requests')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours else None
+    entries = [
+        entry for entry in iter_entries(args.log_dir, since)
+        if not args.endpoint or entry['endpoint'] in args.endpoint
+    ]
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        print(f"❌ No logged queries found in {args.log_dir}")
+        return
+
+    print(f"🔁 Replaying {len(entries)} requests against {args.base_url} at {args.speed}x")
+    stats = replay(entries, args.base_url, args.speed, args.concurrency, args.timeout)
+    print(json.dumps(stats, indent=2))
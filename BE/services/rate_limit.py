@@ -0,0 +1,71 @@
+import os
+import time
+import threading
+from typing import Optional
+from services.shared_store import SharedStore, get_shared_store
+
+# Requests per minute across all workers; 0 disables the limit
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv('LLM_RATE_LIMIT_PER_MINUTE', '0'))
+LLM_RATE_LIMIT_BURST = float(os.getenv('LLM_RATE_LIMIT_BURST', '10'))
+# Longest a request waits for a token before giving up
+LLM_RATE_LIMIT_WAIT = float(os.getenv('LLM_RATE_LIMIT_WAIT', '5'))
+
+
+class RateLimited(Exception):
+    """Raised when no token became available within the wait limit"""
+    pass
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at rate_per_minute, holding at most burst tokens.
+
+    With a SharedStore the bucket is shared by every worker process, so the
+    limit holds for the whole server rather than per worker.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: float, store: Optional[SharedStore] = None):
+        self.name = name
+        self.rate = rate_per_minute / 60
+        self.burst = max(burst, 1)
+        self.store = store
+        self._tokens = self.burst
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        if self.store is not None:
+            return self.store.take_token(self.name, self.rate, self.burst)
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: float = LLM_RATE_LIMIT_WAIT) -> bool:
+        """Take a token, waiting up to timeout seconds for one"""
+        deadline = time.time() + timeout
+        while True:
+            wait = self._take()
+            if wait == 0:
+                return True
+            if time.time() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_llm_bucket = None
+
+
+def acquire_llm_slot():
+    """Wait for the LLM rate limit; raises RateLimited when it cannot be met"""
+    global _llm_bucket
+    if LLM_RATE_LIMIT_PER_MINUTE <= 0:
+        return
+    if _llm_bucket is None:
+        _llm_bucket = TokenBucket('llm', LLM_RATE_LIMIT_PER_MINUTE, LLM_RATE_LIMIT_BURST, get_shared_store())
+    if not _llm_bucket.acquire():
+        raise RateLimited(f"LLM rate limit of {LLM_RATE_LIMIT_PER_MINUTE:g}/min reached")
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional
+
+
+def _default_path() -> str:
+    # /dev/shm keeps the file in memory on Linux; fall back to the temp dir elsewhere
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'blue-job-shared.db')
+
+
+# Enabled by gunicorn.conf.py; a single uvicorn process keeps its state in memory
+SHARED_STATE_ENABLED = os.getenv('SHARED_STATE_ENABLED', 'false').lower() == 'true'
+SHARED_STATE_PATH = os.getenv('SHARED_STATE_PATH') or _default_path()
+
+# Expired cache entries and size limits are enforced every PRUNE_EVERY writes per namespace
+PRUNE_EVERY = 64
+# How long a process trusts its last read of a generation counter
+GENERATION_CHECK_INTERVAL = 1.0
+
+
+class SharedStore:
+    """
+    Cross-process state for the worker processes of one host.
+
+    A SQLite database in shared memory holds cache entries, rate-limit
+    buckets, generation counters and per-worker metrics. Each process and
+    thread opens its own connection, so the store is safe to create before
+    the server forks.
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes: Dict[str, int] = {}
+        self._generations: Dict[str, tuple] = {}
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS kv (
+                    ns TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (ns, key)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS generations (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS worker_metrics (
+                    worker TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # Key/value cache
+
+    def get(self, ns: str, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE ns = ? AND key = ? AND expires_at > ?", (ns, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, ns: str, key: str, value: Any, ttl: float, maxsize: Optional[int] = None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (ns, key, json.dumps(value), time.time() + ttl)
+        )
+        self._writes[ns] = self._writes.get(ns, 0) + 1
+        if self._writes[ns] % PRUNE_EVERY == 0:
+            self.prune(ns, maxsize)
+
+    def prune(self, ns: str, maxsize: Optional[int] = None):
+        """Drop expired entries, then the entries closest to expiry beyond maxsize"""
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE ns = ? AND expires_at <= ?", (ns, time.time()))
+        if maxsize:
+            conn.execute("""
+                DELETE FROM kv WHERE ns = ? AND key IN (
+                    SELECT key FROM kv WHERE ns = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (ns, ns, maxsize))
+
+    def claim(self, ns: str, key: str, ttl: float) -> bool:
+        """Set key if it is absent or expired; True only for the one caller that set it"""
+        conn = self._conn()
+        conn.execute("DELETE FROM kv WHERE ns = ? AND key = ? AND expires_at <= ?", (ns, key, time.time()))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO kv (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (ns, key, json.dumps(os.getpid()), time.time() + ttl)
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, ns: str, key: str):
+        self._conn().execute("DELETE FROM kv WHERE ns = ? AND key = ?", (ns, key))
+
+    def clear(self, ns: str):
+        self._conn().execute("DELETE FROM kv WHERE ns = ?", (ns,))
+
+    def count(self, ns: str) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM kv WHERE ns = ? AND expires_at > ?", (ns, time.time())
+        ).fetchone()[0]
+
+    # Token buckets
+
+    def take_token(self, name: str, rate_per_second: float, burst: float) -> float:
+        """
+        Take one token from a shared bucket.
+
+        Returns 0 when a token was granted, otherwise the seconds until one
+        will be available.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate_per_second)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate_per_second
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)", (name, tokens, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Generation counters
+
+    def bump_generation(self, name: str) -> int:
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO generations (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+        value = conn.execute("SELECT value FROM generations WHERE name = ?", (name,)).fetchone()[0]
+        self._generations[name] = (value, time.time())
+        return value
+
+    def generation(self, name: str) -> int:
+        cached = self._generations.get(name)
+        if cached is not None and time.time() - cached[1] < GENERATION_CHECK_INTERVAL:
+            return cached[0]
+        row = self._conn().execute("SELECT value FROM generations WHERE name = ?", (name,)).fetchone()
+        value = row[0] if row else 0
+        self._generations[name] = (value, time.time())
+        return value
+
+    # Worker metrics
+
+    def put_metrics(self, worker: str, data: Dict[str, Any]):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO worker_metrics (worker, data, updated_at) VALUES (?, ?, ?)",
+            (worker, json.dumps(data), time.time())
+        )
+
+    def all_metrics(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute("SELECT data FROM worker_metrics ORDER BY worker").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete_metrics(self, worker: str):
+        self._conn().execute("DELETE FROM worker_metrics WHERE worker = ?", (worker,))
+
+    def reset_metrics(self):
+        self._conn().execute("DELETE FROM worker_metrics")
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_shared_store() -> Optional[SharedStore]:
+    """Process-wide SharedStore, or None when shared state is disabled"""
+    global _shared_store
+    if not SHARED_STATE_ENABLED:
+        return None
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = SharedStore()
+    return _shared_store
+
+
+def catalog_generation() -> int:
+    """Bumped after every reindex so other workers reload their in-memory indexes"""
+    store = get_shared_store()
+    return store.generation('catalog') if store is not None else 0
+
+
+def bump_catalog_generation() -> int:
+    store = get_shared_store()
+    return store.bump_generation('catalog') if store is not None else 0
@@ -0,0 +1,234 @@
+import re
+import time
+import bisect
+import heapq
+import threading
+from array import array
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from services.dedup import iter_job_batches
+from services.job_snapshot import DATA_FILE, SNAPSHOT_DIR, load_snapshot
+from services.shared_store import catalog_generation
+
+SUGGEST_FIELDS = ('title', 'company', 'location')
+
+# Values kept per precomputed prefix and sort order; covers the largest /suggest limit
+TOP_K = 20
+# Prefixes matching more keys than this get precomputed top lists; shorter ranges are scanned
+PREFIX_SCAN_LIMIT = 256
+# Heavy prefixes are precomputed up to this length (bounds the build recursion)
+MAX_PRECOMPUTED_LENGTH = 64
+SORT_ORDERS = ('frequency', 'rating')
+
+# Sorts after any character of a normalized key, so prefix + _KEY_END bounds the prefix's range
+_KEY_END = '\U0010ffff'
+
+WORD_START_RE = re.compile(r'(?:^|(?<=[\s\-/,(]))\w')
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+class FieldPrefixIndex:
+    """
+    Sorted-array prefix index over the distinct values of one field.
+
+    Each value is keyed by its full normalized text and by every word-start
+    suffix ("senior python developer" is also found by "python" and
+    "developer"). Lookups are a binary search into the sorted keys; prefixes
+    matching too many keys to scan per request answer from top lists
+    precomputed per sort order.
+    """
+
+    def __init__(self, stats: Dict[str, List[float]]):
+        self.values = sorted(stats)
+        self.normalized = [normalize(v) for v in self.values]
+        self.counts = array('I', (int(stats[v][0]) for v in self.values))
+        self.ratings = array('f', (stats[v][1] / stats[v][2] if stats[v][2] else 0.0 for v in self.values))
+
+        entries = []
+        for value_id, normalized in enumerate(self.normalized):
+            if not normalized:
+                continue
+            for match in WORD_START_RE.finditer(normalized):
+                entries.append((normalized[match.start():], value_id))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.value_ids = array('I', (value_id for _, value_id in entries))
+        self.full_match = array('b', (1 if key == self.normalized[value_id] else 0 for key, value_id in entries))
+
+        # Top TOP_K value ids per sort order for every prefix matching more than PREFIX_SCAN_LIMIT keys
+        self.top: Dict[str, Dict[str, array]] = {sort_by: {} for sort_by in SORT_ORDERS}
+        self._precompute(0, len(self.keys), '')
+
+    def rank(self, value_id: int, full: int, sort_by: str = 'frequency') -> tuple:
+        """Sort key: full-value matches first, then rating or frequency, then frequency"""
+        count = self.counts[value_id]
+        return (full, self.ratings[value_id] if sort_by == 'rating' else count, count)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect.bisect_left(self.keys, prefix)
+        return start, bisect.bisect_left(self.keys, prefix + _KEY_END, start)
+
+    def _scan(self, start: int, stop: int) -> Dict[int, int]:
+        matches: Dict[int, int] = {}
+        for i in range(start, stop):
+            value_id = self.value_ids[i]
+            matches[value_id] = max(matches.get(value_id, 0), self.full_match[i])
+        return matches
+
+    def _top(self, matches: Dict[int, int], sort_by: str, limit: int) -> List[int]:
+        return heapq.nlargest(limit, matches, key=lambda value_id: self.rank(value_id, matches[value_id], sort_by))
+
+    def _precompute(self, start: int, stop: int, prefix: str) -> Dict[int, int]:
+        """
+        Fill self.top for the heavy prefixes under keys[start:stop] (all
+        starting with prefix) and return the candidate values for prefix.
+
+        A value's best key under prefix lies under one of prefix's one-char
+        extensions, so the top values of prefix are among the merged top
+        values of those extensions and each key is scanned only once.
+        """
+        heavy = stop - start > PREFIX_SCAN_LIMIT
+        if not heavy or len(prefix) >= MAX_PRECOMPUTED_LENGTH:
+            matches = self._scan(start, stop)
+        else:
+            depth = len(prefix)
+            matches = {}
+            i = start
+            # Keys equal to prefix sort first, then one group per next character
+            while i < stop and len(self.keys[i]) == depth:
+                value_id = self.value_ids[i]
+                matches[value_id] = max(matches.get(value_id, 0), self.full_match[i])
+                i += 1
+            while i < stop:
+                child = self.keys[i][:depth + 1]
+                end = bisect.bisect_left(self.keys, child + _KEY_END, i, stop)
+                for value_id, full in self._precompute(i, end, child).items():
+                    matches[value_id] = max(matches.get(value_id, 0), full)
+                i = end
+
+        candidates: Dict[int, int] = {}
+        for sort_by in SORT_ORDERS:
+            top = self._top(matches, sort_by, TOP_K)
+            if heavy and prefix:
+                self.top[sort_by][prefix] = array('I', top)
+            for value_id in top:
+                candidates[value_id] = matches[value_id]
+        return candidates
+
+    def lookup(self, prefix: str, sort_by: str = 'frequency', limit: int = TOP_K) -> Dict[int, int]:
+        """Best `limit` matching value ids under sort_by -> 1 if the full value starts with prefix, else 0"""
+        start, stop = self._range(prefix)
+        if stop - start > PREFIX_SCAN_LIMIT:
+            top = self.top[sort_by].get(prefix)
+            if top is not None and limit <= TOP_K:
+                return {value_id: int(self.normalized[value_id].startswith(prefix)) for value_id in top[:limit]}
+        # Short range (or a heavy prefix past MAX_PRECOMPUTED_LENGTH): scan it
+        matches = self._scan(start, stop)
+        return {value_id: matches[value_id] for value_id in self._top(matches, sort_by, limit)}
+
+
+class SuggestIndexBuilder:
+    """Accumulates per-value document frequency and rating while jobs stream by"""
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, List[float]]] = {field: {} for field in SUGGEST_FIELDS}
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]]):
+        for doc in documents:
+            rating = doc.get('rating')
+            for field in SUGGEST_FIELDS:
+                value = doc.get(field)
+                if not value:
+                    continue
+                entry = self.stats[field].get(value)
+                if entry is None:
+                    entry = self.stats[field][value] = [0, 0.0, 0]
+                entry[0] += 1
+                if rating is not None:
+                    entry[1] += rating
+                    entry[2] += 1
+
+    def build(self) -> Dict[str, FieldPrefixIndex]:
+        return {field: FieldPrefixIndex(stats) for field, stats in self.stats.items()}
+
+
+class SuggestService:
+    """Typeahead suggestions for title, company and location"""
+
+    def __init__(self, csv_path: str = DATA_FILE, snapshot_dir: str = SNAPSHOT_DIR):
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self._fields: Optional[Dict[str, FieldPrefixIndex]] = None
+        self._generation = catalog_generation()
+        self._lock = threading.Lock()
+
+    def publish(self, fields: Dict[str, FieldPrefixIndex]):
+        """Swap in an index built during import"""
+        self._fields = fields
+        self._generation = catalog_generation()
+
+    def index(self) -> Optional[Dict[str, FieldPrefixIndex]]:
+        """Get the prefix index, building it from the snapshot if no import ran in this process"""
+        generation = catalog_generation()
+        if generation != self._generation:
+            # Another worker reindexed; rebuild from the new snapshot
+            self._fields = None
+            self._generation = generation
+        if self._fields is None:
+            with self._lock:
+                if self._fields is None:
+                    snapshot = load_snapshot(self.csv_path, self.snapshot_dir)
+                    if snapshot is not None:
+                        started = time.time()
+                        builder = SuggestIndexBuilder()
+                        for batch in iter_job_batches(snapshot, 1000, compute=False):
+                            builder.add_documents(batch)
+                        self._fields = builder.build()
+                        print(f"🔤 Built suggestion index in {time.time() - started:.2f}s")
+        return self._fields
+
+    def suggest(self, query: str, field: Optional[str] = None, limit: int = 8, sort_by: str = 'frequency') -> Dict[str, Any]:
+        """
+        Complete a partial query against distinct field values.
+
+        Values whose full text starts with the query rank above word-start
+        (infix) matches; ties are broken by document frequency or by
+        average company rating.
+        """
+        started = time.time()
+        prefix = normalize(query)
+        fields = self.index() or {}
+        names = [field] if field else list(SUGGEST_FIELDS)
+
+        candidates = []
+        if prefix:
+            for name in names:
+                field_index = fields.get(name)
+                if field_index is None:
+                    continue
+                for value_id, full in field_index.lookup(prefix, sort_by, limit).items():
+                    candidates.append((field_index.rank(value_id, full, sort_by), name, field_index.values[value_id],
+                                       field_index.counts[value_id], field_index.ratings[value_id]))
+
+        top = heapq.nlargest(limit, candidates, key=lambda c: c[0])
+        return {
+            'query': query,
+            'suggestions': [
+                {'field': name, 'value': value, 'count': count, 'rating': round(rating, 2) if rating else None}
+                for _, name, value, count, rating in top
+            ],
+            'took_ms': round((time.time() - started) * 1000, 2)
+        }
+
+
+_suggest_service = None
+
+
+def get_suggest_service() -> SuggestService:
+    """Process-wide SuggestService instance"""
+    global _suggest_service
+    if _suggest_service is None:
+        _suggest_service = SuggestService()
+    return _suggest_service
@@ -19,6 +19,9 @@ function App() {
   const [chatLoading, setChatLoading] = useState(false);
   const [chatError, setChatError] = useState(null);
   const [selectedJob, setSelectedJob] = useState(null);
+  // The server keeps the conversation; we only send the session id and context changes
+  const [chatSessionId, setChatSessionId] = useState(null);
+  const [chatContextJobId, setChatContextJobId] = useState(null);
 
   // Theme management
   useEffect(() => {
@@ -136,18 +139,21 @@ function App() {
     const userMessage = { role: "user", content: chatInput };
     setChatHistory((prev) => [...prev, userMessage]);
     setChatLoading(true);
+    const contextChanged = selectedJob && selectedJob.job_id !== chatContextJobId;
     try {
       const response = await fetch("/api/chat", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           message: chatInput,
-          history: chatHistory,
-          context: selectedJob,
+          session_id: chatSessionId,
+          ...(contextChanged && { context: selectedJob }),
         }),
       });
       if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
       const data = await response.json();
+      setChatSessionId(data.session_id);
+      if (contextChanged) setChatContextJobId(selectedJob.job_id);
       setChatHistory((prev) => [
         ...prev,
         { role: "llm", content: data.reply }